@@ -0,0 +1,53 @@
+"""Compare two benchmark result files written by `load_test.py` or `ingest_bench.py`.
+
+Prints every numeric metric of the benchmarks found in both files, with the
+relative change from the baseline:
+
+    python benchmarks/compare.py before.json after.json
+"""
+import argparse
+import json
+
+# Metrics where a lower value is an improvement
+LOWER_IS_BETTER = ("_ms", "seconds", "errors", "_bytes")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def describe(report):
+    return f"{report.get('label', 'run')} @ {report.get('commit') or 'unknown commit'}"
+
+
+def compare(baseline, candidate):
+    """Yield (benchmark, metric, baseline value, candidate value, change in percent)."""
+    for name, stats in baseline["results"].items():
+        other = candidate["results"].get(name)
+        if other is None:
+            continue
+        for metric, value in stats.items():
+            new = other.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            change = (new - value) / value * 100 if value else 0.0
+            yield name, metric, value, new, change
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"{describe(baseline)} -> {describe(candidate)}")
+    for name, metric, old, new, change in compare(baseline, candidate):
+        better = change < 0 if metric.endswith(LOWER_IS_BETTER) else change > 0
+        mark = "" if abs(change) < 1 else (" +" if better else " -")
+        print(f"{name:28} {metric:16} {old:>12} {new:>12} {change:+8.1f}%{mark}")
+
+
+if __name__ == "__main__":
+    main()
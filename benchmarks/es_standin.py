@@ -0,0 +1,175 @@
+"""In-process Elasticsearch stand-in for benchmarks.
+
+Answers the handful of endpoints the backend and the ingest scripts use with
+canned responses after a fixed artificial latency, so that client-side
+overhead (threadpool vs event loop, connection reuse, serialization) can be
+measured without a real cluster. Searches, point-in-time, scroll and
+`_msearch` serve the API; `_bulk` and the index/alias admin calls serve
+`scripts/elasticsearch/index_data.py`.
+
+    python benchmarks/es_standin.py --port 9201 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+from aiohttp import web
+
+PRODUCT_HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+SCROLL_PAGES = 5  # Pages served per scroll before it runs dry
+BULK_MAX_BYTES = 100 * 1024 * 1024
+SAMPLE_SOURCE = {
+    "STATE": "TEXAS",
+    "EVENT_TYPE": "Hail",
+    "CZ_NAME": "HARRIS",
+    "BEGIN_DATE_TIME": "12-APR-15 14:05:00",
+    "DAMAGE_PROPERTY": "10.00K",
+    "EVENT_NARRATIVE": "Hail up to the size of quarters fell across the county. " * 8,
+}
+
+# Values of composite (autocomplete) aggregations
+COMPOSITE_VALUES = ["TEXAS", "TENNESSEE", "Hail", "Thunderstorm Wind", "Flash Flood", "HARRIS", "HARRISON", "HARDIN"]
+
+
+def json_response(body):
+    return web.Response(text=json.dumps(body), content_type="application/json", headers=PRODUCT_HEADERS)
+
+
+def aggregation_buckets(aggregation):
+    """Canned buckets keyed the way the aggregation type keys them."""
+    if "date_histogram" in aggregation:
+        day = 86400000
+        sums = {name: {"value": 1.0} for name in aggregation.get("aggs", {})}
+        return [{"key": i * day, "key_as_string": str(i), "doc_count": i % 50, **sums} for i in range(3650)]
+    if "composite" in aggregation:
+        if "after" in aggregation["composite"]:
+            return []  # A single page of values
+        source = next(iter(aggregation["composite"]["sources"][0]))
+        return [{"key": {source: value}, "doc_count": 1000 - i} for i, value in enumerate(COMPOSITE_VALUES)]
+    if "geotile_grid" in aggregation:
+        precision = aggregation["geotile_grid"].get("precision", 7)
+        return [{"key": f"{precision}/{i}/{i}", "doc_count": 1000 - i} for i in range(10)]
+    return [{"key": f"KEY {i}", "doc_count": 1000 - i} for i in range(10)]
+
+
+def project(source_filter):
+    """The canned document reduced to a search's `_source` includes."""
+    if isinstance(source_filter, dict) and source_filter.get("includes"):
+        return {field: SAMPLE_SOURCE[field] for field in source_filter["includes"] if field in SAMPLE_SOURCE}
+    return SAMPLE_SOURCE
+
+
+def search_body(size, aggs=None, source_filter=True):
+    source = project(source_filter)
+    hits = [{"_index": "standin", "_id": str(i), "_source": source} for i in range(size)]
+    aggs = aggs or {"event_types": {}, "states": {}}
+    aggregations = {name: {"buckets": aggregation_buckets(aggregation)} for name, aggregation in aggs.items()}
+    for aggregation in aggregations.values():
+        if aggregation["buckets"] and isinstance(aggregation["buckets"][-1]["key"], dict):
+            aggregation["after_key"] = aggregation["buckets"][-1]["key"]
+    return {"took": 3, "timed_out": False, "hits": {"total": {"value": 10000, "relation": "eq"}, "hits": hits},
+            "aggregations": aggregations}
+
+
+def make_app(latency):
+    scrolls = {}  # scroll id -> pages left, so exports terminate
+
+    async def info(request):
+        return json_response({"version": {"number": "7.10.0", "build_flavor": "default"}, "tagline": "You Know, for Search"})
+
+    async def search(request):
+        await asyncio.sleep(latency)
+        body = await request.json() if request.can_read_body else {}
+        size = int(request.query.get("size", body.get("size", 10)))
+        response = search_body(size, body.get("aggs"), body.get("_source", True))
+        if "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+            for i, hit in enumerate(response["hits"]["hits"]):
+                hit["sort"] = [i, i]
+        if "scroll" in request.query:
+            scroll_id = f"scroll-{len(scrolls)}"
+            scrolls[scroll_id] = SCROLL_PAGES
+            response["_scroll_id"] = scroll_id
+        return json_response(response)
+
+    async def scroll(request):
+        await asyncio.sleep(latency)
+        body = await request.json()
+        scroll_id = body["scroll_id"]
+        scrolls[scroll_id] = scrolls.get(scroll_id, 1) - 1
+        response = search_body(10 if scrolls[scroll_id] > 0 else 0)
+        response["_scroll_id"] = scroll_id
+        return json_response(response)
+
+    async def clear_scroll(request):
+        return json_response({"succeeded": True, "num_freed": 1})
+
+    async def msearch(request):
+        await asyncio.sleep(latency)
+        lines = [json.loads(line) for line in (await request.text()).splitlines() if line.strip()]
+        searches = lines[1::2]
+        responses = [search_body(search.get("size", 10), search.get("aggs"), search.get("_source", True)) for search in searches]
+        for search, response in zip(searches, responses):
+            if "sort" in search:
+                for i, hit in enumerate(response["hits"]["hits"]):
+                    hit["sort"] = [i, i]
+        return json_response({"took": 3, "responses": responses})
+
+    async def open_pit(request):
+        return json_response({"id": "standin-pit"})
+
+    async def close_pit(request):
+        return json_response({"succeeded": True, "num_freed": 1})
+
+    async def bulk(request):
+        await asyncio.sleep(latency)
+        lines = (await request.read()).count(b"\n")
+        items = [{"index": {"status": 201}} for _ in range(lines // 2)]
+        return json_response({"took": 3, "errors": False, "items": items})
+
+    async def acknowledged(request):
+        return json_response({"acknowledged": True})
+
+    async def mapping(request):
+        properties = {field: {"type": "keyword"} for field in SAMPLE_SOURCE}
+        properties["BEGIN_POINT"] = {"type": "geo_point"}
+        return json_response({request.match_info["index"]: {"mappings": {"properties": properties}}})
+
+    async def missing(request):
+        return web.Response(status=404, headers=PRODUCT_HEADERS)
+
+    app = web.Application(client_max_size=BULK_MAX_BYTES)
+    app.router.add_get("/", info)
+    app.router.add_route("*", "/_search", search)
+    app.router.add_route("*", "/{index}/_search", search)
+    app.router.add_post("/_search/scroll", scroll)
+    app.router.add_get("/_search/scroll", scroll)
+    app.router.add_delete("/_search/scroll", clear_scroll)
+    app.router.add_route("*", "/_msearch", msearch)
+    app.router.add_route("*", "/{index}/_msearch", msearch)
+    app.router.add_post("/{index}/_pit", open_pit)
+    app.router.add_delete("/_pit", close_pit)
+    app.router.add_post("/_bulk", bulk)
+    # Index and alias administration used by the index manager
+    app.router.add_get("/_alias/{alias}", missing)
+    app.router.add_post("/_aliases", acknowledged)
+    app.router.add_post("/{index}/_refresh", acknowledged)
+    app.router.add_post("/{index}/_forcemerge", acknowledged)
+    app.router.add_put("/{index}/_settings", acknowledged)
+    app.router.add_put("/{index}/_mapping", acknowledged)
+    app.router.add_get("/{index}/_mapping", mapping)
+    app.router.add_head("/{index}", missing)
+    app.router.add_put("/{index}", acknowledged)
+    app.router.add_delete("/{index}", acknowledged)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=9201)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency_ms / 1000), port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
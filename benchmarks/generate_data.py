@@ -0,0 +1,192 @@
+"""Seeded synthetic NOAA datasets for benchmarks.
+
+Writes storm events, GSOD and ISD CSVs in the same layout and columns as
+`scripts/download_data.py` leaves them under `data/raw`, so every ingest
+script can run on them unchanged. The same seed and scale always produce the
+same files.
+
+    python benchmarks/generate_data.py --output /tmp/noaa-bench/raw --storm-rows 200000 --stations 50
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import date, datetime, timedelta
+
+STATES = [
+    ("TEXAS", 48), ("KANSAS", 20), ("OKLAHOMA", 40), ("NEBRASKA", 31), ("IOWA", 19),
+    ("FLORIDA", 12), ("GEORGIA", 13), ("MISSOURI", 29), ("COLORADO", 8), ("OHIO", 39),
+]
+EVENT_TYPES = [
+    ("Hail", 30), ("Thunderstorm Wind", 30), ("Flash Flood", 10), ("Tornado", 5), ("Flood", 8),
+    ("Winter Storm", 6), ("Heavy Rain", 5), ("Drought", 3), ("High Wind", 3),
+]
+DAMAGE_SUFFIXES = ["K", "K", "K", "M", "B"]
+
+STORM_COLUMNS = [
+    "BEGIN_YEARMONTH", "BEGIN_DAY", "BEGIN_TIME", "END_YEARMONTH", "END_DAY", "END_TIME",
+    "EPISODE_ID", "EVENT_ID", "STATE", "STATE_FIPS", "YEAR", "MONTH_NAME", "EVENT_TYPE",
+    "CZ_TYPE", "CZ_FIPS", "CZ_NAME", "WFO", "BEGIN_DATE_TIME", "CZ_TIMEZONE", "END_DATE_TIME",
+    "INJURIES_DIRECT", "INJURIES_INDIRECT", "DEATHS_DIRECT", "DEATHS_INDIRECT",
+    "DAMAGE_PROPERTY", "DAMAGE_CROPS", "SOURCE", "MAGNITUDE", "MAGNITUDE_TYPE", "FLOOD_CAUSE",
+    "CATEGORY", "TOR_F_SCALE", "TOR_LENGTH", "TOR_WIDTH", "TOR_OTHER_WFO", "TOR_OTHER_CZ_STATE",
+    "TOR_OTHER_CZ_FIPS", "TOR_OTHER_CZ_NAME", "BEGIN_RANGE", "BEGIN_AZIMUTH", "BEGIN_LOCATION",
+    "END_RANGE", "END_AZIMUTH", "END_LOCATION", "BEGIN_LAT", "BEGIN_LON", "END_LAT", "END_LON",
+    "EPISODE_NARRATIVE", "EVENT_NARRATIVE", "DATA_SOURCE",
+]
+GSOD_COLUMNS = [
+    "STATION", "DATE", "LATITUDE", "LONGITUDE", "ELEVATION", "NAME", "TEMP", "TEMP_ATTRIBUTES",
+    "DEWP", "DEWP_ATTRIBUTES", "SLP", "SLP_ATTRIBUTES", "STP", "STP_ATTRIBUTES", "VISIB",
+    "VISIB_ATTRIBUTES", "WDSP", "WDSP_ATTRIBUTES", "MXSPD", "GUST", "MAX", "MAX_ATTRIBUTES",
+    "MIN", "MIN_ATTRIBUTES", "PRCP", "PRCP_ATTRIBUTES", "SNDP", "FRSHTT",
+]
+ISD_COLUMNS = [
+    "STATION", "DATE", "SOURCE", "LATITUDE", "LONGITUDE", "ELEVATION", "NAME", "REPORT_TYPE",
+    "CALL_SIGN", "QUALITY_CONTROL", "WND", "CIG", "VIS", "TMP", "DEW", "SLP",
+]
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def noaa_timestamp(moment):
+    """NOAA's storm events format, e.g. "28-APR-15 14:45:00"."""
+    return moment.strftime("%d-%b-%y %H:%M:%S").upper()
+
+
+def damage(rng):
+    if rng.random() < 0.6:
+        return "0.00K"
+    return f"{rng.uniform(0.1, 500):.2f}{rng.choice(DAMAGE_SUFFIXES)}"
+
+
+def storm_event_row(rng, year, event_id):
+    state, state_fips = rng.choice(STATES)
+    event_type = weighted(rng, EVENT_TYPES)
+    begin = datetime(year, 1, 1) + timedelta(minutes=rng.randrange(365 * 24 * 60))
+    end = begin + timedelta(minutes=rng.randrange(5, 600))
+    lat, lon = rng.uniform(25, 49), rng.uniform(-124, -67)
+    tornado = event_type == "Tornado"
+    return {
+        "BEGIN_YEARMONTH": begin.strftime("%Y%m"), "BEGIN_DAY": begin.day, "BEGIN_TIME": begin.strftime("%H%M"),
+        "END_YEARMONTH": end.strftime("%Y%m"), "END_DAY": end.day, "END_TIME": end.strftime("%H%M"),
+        "EPISODE_ID": event_id // 4, "EVENT_ID": event_id, "STATE": state, "STATE_FIPS": state_fips,
+        "YEAR": year, "MONTH_NAME": begin.strftime("%B"), "EVENT_TYPE": event_type, "CZ_TYPE": "C",
+        "CZ_FIPS": rng.randrange(1, 300), "CZ_NAME": f"COUNTY {rng.randrange(1, 300)}",
+        "WFO": rng.choice(["FWD", "OUN", "TOP", "DMX", "MLB"]), "BEGIN_DATE_TIME": noaa_timestamp(begin),
+        "CZ_TIMEZONE": "CST-6", "END_DATE_TIME": noaa_timestamp(end),
+        "INJURIES_DIRECT": rng.choices([0, 1, 2, 5], weights=[95, 3, 1, 1])[0], "INJURIES_INDIRECT": 0,
+        "DEATHS_DIRECT": rng.choices([0, 1], weights=[99, 1])[0], "DEATHS_INDIRECT": 0,
+        "DAMAGE_PROPERTY": damage(rng), "DAMAGE_CROPS": damage(rng), "SOURCE": "Trained Spotter",
+        "MAGNITUDE": f"{rng.uniform(0.75, 3):.2f}" if event_type == "Hail" else "",
+        "MAGNITUDE_TYPE": "", "FLOOD_CAUSE": "", "CATEGORY": "",
+        "TOR_F_SCALE": f"EF{rng.randrange(0, 4)}" if tornado else "",
+        "TOR_LENGTH": f"{rng.uniform(0.1, 20):.2f}" if tornado else "",
+        "TOR_WIDTH": rng.randrange(10, 800) if tornado else "",
+        "TOR_OTHER_WFO": "", "TOR_OTHER_CZ_STATE": "", "TOR_OTHER_CZ_FIPS": "", "TOR_OTHER_CZ_NAME": "",
+        "BEGIN_RANGE": rng.randrange(0, 10), "BEGIN_AZIMUTH": rng.choice(["N", "SE", "W"]),
+        "BEGIN_LOCATION": f"TOWN {rng.randrange(1, 500)}", "END_RANGE": rng.randrange(0, 10),
+        "END_AZIMUTH": rng.choice(["N", "SE", "W"]), "END_LOCATION": f"TOWN {rng.randrange(1, 500)}",
+        "BEGIN_LAT": f"{lat:.4f}", "BEGIN_LON": f"{lon:.4f}",
+        "END_LAT": f"{lat + rng.uniform(-0.1, 0.1):.4f}", "END_LON": f"{lon + rng.uniform(-0.1, 0.1):.4f}",
+        "EPISODE_NARRATIVE": "A line of storms moved across the area during the afternoon.",
+        "EVENT_NARRATIVE": f"{event_type} reported near town {rng.randrange(1, 500)}.",
+        "DATA_SOURCE": "CSV",
+    }
+
+
+def write_storm_events(rng, output, years, rows):
+    directory = os.path.join(output, "storm_events")
+    os.makedirs(directory, exist_ok=True)
+    event_id = 1
+    for year in years:
+        path = os.path.join(directory, f"StormEvents_details-ftp_v1.0_d{year}_c20240101.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=STORM_COLUMNS)
+            writer.writeheader()
+            for _ in range(rows // len(years)):
+                writer.writerow(storm_event_row(rng, year, event_id))
+                event_id += 1
+
+
+def station_ids(rng, count):
+    return sorted({f"{rng.randrange(10000, 99999)}{rng.randrange(10000, 99999):05d}0" for _ in range(count)})
+
+
+def write_gsod(rng, output, years, stations, days):
+    for year in years:
+        directory = os.path.join(output, "gsod", str(year))
+        os.makedirs(directory, exist_ok=True)
+        for station in stations:
+            lat, lon, elevation = rng.uniform(-60, 70), rng.uniform(-180, 180), rng.uniform(0, 2000)
+            with open(os.path.join(directory, f"{station}.csv"), "w", newline="") as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_ALL)  # GSOD quotes every field
+                writer.writerow(GSOD_COLUMNS)
+                for day in range(days):
+                    temp = rng.gauss(55, 20)
+                    writer.writerow([
+                        station, (date(year, 1, 1) + timedelta(days=day)).isoformat(),
+                        f"{lat:.8f}", f"{lon:.8f}", f"{elevation:.1f}", f"STATION {station}, XX",
+                        f"{temp:6.1f}", 24, f"{temp - 10:6.1f}", 24, f"{rng.gauss(1013, 8):6.1f}", 24,
+                        f"{rng.gauss(990, 20):5.1f}", 24, f"{rng.uniform(2, 10):5.1f}", 24,
+                        f"{rng.uniform(0, 20):5.1f}", 24, f"{rng.uniform(5, 30):5.1f}", "999.9",
+                        f"{temp + 8:6.1f}", "*", f"{temp - 8:6.1f}", "*",
+                        f"{rng.choice([0, 0, 0, rng.uniform(0, 2)]):5.2f}", "G", "999.9",
+                        f"{rng.randrange(0, 2)}{rng.randrange(0, 2)}0000",
+                    ])
+
+
+def write_isd(rng, output, years, stations, days):
+    observations_per_day = 24
+    for year in years:
+        directory = os.path.join(output, "isd", str(year))
+        os.makedirs(directory, exist_ok=True)
+        for station in stations:
+            lat, lon, elevation = rng.uniform(-60, 70), rng.uniform(-180, 180), rng.uniform(0, 2000)
+            with open(os.path.join(directory, f"{station}.csv"), "w", newline="") as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+                writer.writerow(ISD_COLUMNS)
+                start = datetime(year, 1, 1)
+                for hour in range(days * observations_per_day):
+                    temperature = int(rng.gauss(120, 80))
+                    writer.writerow([
+                        station, (start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M:%S"), 4,
+                        f"{lat:.8f}", f"{lon:.8f}", f"{elevation:.1f}", f"STATION {station}, XX", "FM-15",
+                        "99999", "V020", f"{rng.randrange(0, 360):03d},1,N,{rng.randrange(0, 150):04d},1",
+                        "22000,1,9,N", "016093,1,9,9", f"{temperature:+05d},1", f"{temperature - 40:+05d},1",
+                        f"{rng.randrange(9900, 10300):05d},1",
+                    ])
+
+
+def generate(output, seed=42, years=(2015, 2016), storm_rows=100000, stations=20, days=365):
+    """Write every dataset under `output` and return the number of rows per dataset."""
+    rng = random.Random(seed)
+    write_storm_events(rng, output, years, storm_rows)
+    ids = station_ids(rng, stations)
+    write_gsod(rng, output, years, ids, days)
+    write_isd(rng, output, years, ids, days)
+    return {
+        "storm_events": storm_rows // len(years) * len(years),
+        "gsod": len(ids) * days * len(years),
+        "isd": len(ids) * days * 24 * len(years),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="./data/bench/raw")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, nargs="+", default=[2015, 2016])
+    parser.add_argument("--storm-rows", type=int, default=100000)
+    parser.add_argument("--stations", type=int, default=20, help="Stations per year, for GSOD and ISD")
+    parser.add_argument("--days", type=int, default=365, help="Days per station and year")
+    args = parser.parse_args()
+
+    rows = generate(args.output, args.seed, args.years, args.storm_rows, args.stations, args.days)
+    for dataset, count in rows.items():
+        print(f"[INFO] Generated {count} {dataset} rows under {args.output}")
+
+
+if __name__ == "__main__":
+    main()
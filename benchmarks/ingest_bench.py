@@ -0,0 +1,260 @@
+"""Ingest throughput benchmarks on a synthetic NOAA dataset.
+
+Generates a seeded dataset with `generate_data.py`, then times the loaders of
+`scripts/` on it, once from the raw CSVs and once from the Parquet staging
+layer:
+
+- stage: CSV -> Parquet conversion (`stage_parquet.py`)
+- mongo_upsert / rollup_map: storm events into MongoDB (`ingest_mongo.py`)
+- postgres_copy: GSOD and ISD through the parallel COPY loader (`ingest_postgres.py`)
+- es_bulk: storm events through the per-year bulk indexer (`index_data.py`)
+
+Without `--mongo-uri`, `--postgres` or `--es-url` the databases are replaced
+by in-process stand-ins (a collection that BSON-encodes the writes, a COPY sink
+that drains the stream, the Elasticsearch stand-in), which measures the client
+side of each loader.
+
+    python benchmarks/ingest_bench.py --storm-rows 200000 --stations 20 --output ingest.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import bson
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "scripts", "elasticsearch"))
+
+import generate_data  # noqa: E402
+import stage_parquet  # noqa: E402
+import ingest_mongo  # noqa: E402
+import ingest_postgres  # noqa: E402
+import index_data  # noqa: E402
+import index_manager  # noqa: E402
+import connections  # noqa: E402
+from telemetry import telemetry  # noqa: E402
+
+
+class NullCollection:
+    """Encodes upserts to BSON like the driver would, without storing anything."""
+
+    def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            bson.encode(operation._doc)
+        return SimpleNamespace(upserted_count=len(operations), matched_count=0)
+
+    def drop(self):
+        pass
+
+
+class NullCopyCursor:
+    """Drains the COPY stream like the server would, without storing anything."""
+
+    def __init__(self):
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, statement, stream):
+        lines = 0
+        while True:
+            chunk = stream.read(1024 * 1024)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n" if isinstance(chunk, bytes) else "\n")
+        self.rowcount = lines - 1  # Header
+
+
+class NullCopyConnection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return NullCopyCursor()
+
+
+class NullCopyPool:
+    def getconn(self):
+        return NullCopyConnection()
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        pass
+
+
+def start_es_standin():
+    """Run the Elasticsearch stand-in on a free port in a background thread. Returns the port."""
+    from aiohttp import web
+    from es_standin import make_app
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(make_app(0))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return port
+
+
+def timed(name, rows, results, function, *args):
+    """Run one benchmark and store its rows/s under `name`."""
+    started = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - started
+    results[name] = {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    print(f"[INFO] {name:28} {rows:>10} rows in {elapsed:7.2f}s - {results[name]['rows_per_second']:>10.0f} rows/s")
+
+
+def storm_sources():
+    """(file name, source) pairs the Mongo loader would read, staged fragments first."""
+    fragments = stage_parquet.staged_fragments("storm_events")
+    if fragments:
+        return [(stage_parquet.fragment_source_name(fragment), fragment) for fragment in fragments]
+    directory = os.path.join(stage_parquet.RAW_DATA_DIR, "storm_events")
+    return [(name, os.path.join(directory, name)) for name in sorted(os.listdir(directory)) if name.endswith(".csv")]
+
+
+def bench_stage():
+    for dataset_name in stage_parquet.SCHEMAS:
+        stage_parquet.stage_dataset(dataset_name)
+
+
+def bench_mongo(collection):
+    for _, source in storm_sources():
+        if isinstance(source, str):
+            ingest_mongo.load_file_to_mongo(collection, source, "storm_events")
+        else:
+            ingest_mongo.load_fragment_to_mongo(collection, source, "storm_events")
+
+
+def bench_rollup_map():
+    with ProcessPoolExecutor(max_workers=ingest_mongo.ROLLUP_WORKERS) as executor:
+        for _, source in storm_sources():
+            ingest_mongo.map_chunks(ingest_mongo.read_rollup_chunks(source), executor)
+
+
+def bench_postgres():
+    for dataset_name, info in ingest_postgres.DATASETS.items():
+        ingest_postgres.load_csv_to_postgres(dataset_name, info["table"])
+
+
+def bench_es():
+    build = index_manager.YearIndexBuild(index_data.ES_INDEX)
+    index_data.index_csv_to_es("storm_events", build.index_for)
+    build.finish()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="noaa-bench-")
+    raw_dir, staged_dir = os.path.join(workdir, "raw"), os.path.join(workdir, "staged")
+    shutil.rmtree(staged_dir, ignore_errors=True)
+    rows = generate_data.generate(raw_dir, args.seed, args.years, args.storm_rows, args.stations, args.days)
+    print(f"[INFO] Dataset in {workdir}: {rows}")
+
+    # Point every loader at the synthetic dataset
+    stage_parquet.RAW_DATA_DIR = ingest_mongo.RAW_DATA_DIR = raw_dir
+    ingest_postgres.RAW_DATA_DIR = index_data.RAW_DATA_DIR = raw_dir
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        collection = client["noaa_bench"]["storm_events"]
+    else:
+        client, collection = None, NullCollection()
+
+    if not args.postgres:
+        connections.postgres_pool = NullCopyPool
+        ingest_postgres.ensure_table = lambda pool, table_name, sources: None
+
+    connections.ES_URL = args.es_url.rstrip("/") if args.es_url else f"http://127.0.0.1:{start_es_standin()}"
+    # Builds must not log in to a local API and drop its caches
+    connections.BACKEND_URL = ""
+
+    telemetry.start("ingest_bench")
+    results = {}
+    postgres_rows = rows["gsod"] + rows["isd"]
+    for source in ("raw", "staged"):
+        # An empty staging directory makes every loader fall back to the raw CSVs
+        stage_parquet.STAGED_DATA_DIR = staged_dir if source == "staged" else os.path.join(workdir, "unstaged")
+        if source == "staged":
+            timed("stage", sum(rows.values()), results, bench_stage)
+
+        collection.drop()
+        timed(f"mongo_upsert[{source}]", rows["storm_events"], results, bench_mongo, collection)
+        timed(f"rollup_map[{source}]", rows["storm_events"], results, bench_rollup_map)
+        timed(f"postgres_copy[{source}]", postgres_rows, results, bench_postgres)
+        timed(f"es_bulk[{source}]", rows["storm_events"], results, bench_es)
+
+    if client is not None:
+        client.close()
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "label": args.label,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": {"seed": args.seed, "years": args.years, "rows": rows},
+        "targets": {
+            "mongo": "server" if args.mongo_uri else "BSON encoder",
+            "postgres": "server" if args.postgres else "null COPY sink",
+            "elasticsearch": args.es_url or "stand-in",
+        },
+        "results": results,
+        "stages": telemetry.report()["stages"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, nargs="+", default=[2015, 2016])
+    parser.add_argument("--storm-rows", type=int, default=100000)
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workdir", help="Keep the generated dataset here instead of a temporary directory")
+    parser.add_argument("--mongo-uri", help="Benchmark against this MongoDB instead of the BSON encoder")
+    parser.add_argument("--postgres", action="store_true", help="COPY into the Postgres configured for the scripts")
+    parser.add_argument("--es-url", help="Benchmark against this Elasticsearch instead of the stand-in")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
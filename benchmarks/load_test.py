@@ -0,0 +1,134 @@
+"""Concurrent load test for the protected API endpoints.
+
+Logs in once, then fires a fixed number of requests per endpoint from
+`--concurrency` workers and reports throughput and latency percentiles.
+Run it once against a backend started with ES_CLIENT_MODE=sync and once with
+ES_CLIENT_MODE=async to compare both client paths, or once per commit and
+diff the JSON outputs with `compare.py`:
+
+    python benchmarks/load_test.py --base-url http://localhost:8000 --label async --output async.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import time
+import httpx
+
+INDEX = "mongo_storm_events_data"
+# name -> (method, path, JSON body), one entry per protected endpoint
+ENDPOINTS = {
+    "get_events": ("GET", f"/protected/elasticsearch/{INDEX}?page=1&size=10", None),
+    "get_events_table": ("GET", f"/protected/elasticsearch/{INDEX}?page=1&size=100&fields=EVENT_ID&fields=STATE&fields=EVENT_TYPE&fields=BEGIN_DATE_TIME", None),
+    "get_events_filtered": ("GET", f"/protected/elasticsearch/{INDEX}?state=TEXAS&event_type=Hail&year=2015", None),
+    "get_events_cursor": ("GET", f"/protected/elasticsearch/{INDEX}?pagination=cursor&size=10", None),
+    "search_events": ("GET", f"/protected/elasticsearch/{INDEX}/search?field=EVENT_TYPE&keyword=Hail", None),
+    "autocomplete": ("GET", f"/protected/elasticsearch/{INDEX}/autocomplete?field=CZ_NAME&prefix=har", None),
+    "aggregate_event_type": ("GET", f"/protected/elasticsearch/{INDEX}/aggregate/event_type", None),
+    "aggregate_state": ("GET", f"/protected/elasticsearch/{INDEX}/aggregate/state", None),
+    "filter_by_state": ("GET", f"/protected/elasticsearch/{INDEX}/filter/state?states=TEXAS", None),
+    "geo_tile": ("GET", f"/protected/elasticsearch/{INDEX}/geo/tiles/4/3/6?state=TEXAS", None),
+    "event_timeseries": ("GET", f"/protected/elasticsearch/{INDEX}/timeseries?interval=week&metrics=count&metrics=deaths", None),
+    "gsod_timeseries": ("GET", "/protected/postgres/gsod/stations/72219013874/timeseries?start=2015-01-01&end=2016-12-31", None),
+    "gsod_station_stats": ("GET", "/protected/postgres/gsod/stations/72219013874/stats?start=2015-01-01&end=2016-12-31", None),
+    "gsod_range_stats": ("GET", "/protected/postgres/gsod/stats?start=2016-06-01&end=2016-06-30", None),
+    "export_ndjson": ("GET", f"/protected/elasticsearch/{INDEX}/export?state=TEXAS&fields=EVENT_ID&fields=STATE", None),
+    "dashboard": ("POST", "/protected/dashboard", {
+        "index": INDEX,
+        "widgets": [
+            {"id": "types", "type": "aggregate", "field": "event_type"},
+            {"id": "states", "type": "aggregate", "field": "state"},
+            {"id": "latest", "type": "events", "state": "TEXAS", "pagination": "cursor"},
+            {"id": "gulf", "type": "filter_state", "states": ["TEXAS", "LOUISIANA"]},
+        ],
+    }),
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def get_token(client):
+    response = await client.post("/auth/token", data={"username": "testuser", "password": "testpassword"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_endpoint(client, method, path, body, requests_count, concurrency):
+    latencies, sizes, errors = [], [], 0
+    remaining = iter(range(requests_count))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            sizes.append(response.num_bytes_downloaded)  # On the wire, i.e. compressed
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests_count / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "response_bytes": round(statistics.mean(sizes)),
+    }
+
+
+async def run(base_url, requests_count, concurrency, endpoints=ENDPOINTS):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        client.headers["Authorization"] = f"Bearer {await get_token(client)}"
+        results = {}
+        for name, (method, path, body) in endpoints.items():
+            await run_endpoint(client, method, path, body, min(concurrency, requests_count), concurrency)  # Warm-up
+            results[name] = await run_endpoint(client, method, path, body, requests_count, concurrency)
+        return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    endpoints = {name: ENDPOINTS[name] for name in args.endpoints}
+    results = asyncio.run(run(args.base_url, args.requests, args.concurrency, endpoints))
+    for name, stats in results.items():
+        print(f"[{args.label}] {name:20} {stats['throughput_rps']:8.1f} req/s  "
+              f"p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+              f"{stats['response_bytes']:8d} B  errors {stats['errors']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "label": args.label,
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
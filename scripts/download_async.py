@@ -0,0 +1,211 @@
+import os
+import time
+import asyncio
+import hashlib
+import contextlib
+from urllib.parse import urlsplit
+import aiohttp
+from download_data import (
+    DATASETS,
+    OUTPUT_DIR,
+    MANIFEST_PATH,
+    CHUNK_SIZE,
+    REQUEST_TIMEOUT,
+    MAX_DATASET_SIZE_GB,
+    MAX_RUN_SIZE_GB,
+    BYTES_IN_GB,
+    Manifest,
+    ByteBudget,
+    reserve,
+    build_request_headers,
+    file_sha256,
+    file_year,
+    parse_listing,
+    ensure_directory_exists,
+    log_file_size,
+)
+from telemetry import telemetry
+
+# Concurrent transfers allowed per host, shared by every dataset served from it
+HOST_CONCURRENCY = {
+    "www.ncei.noaa.gov": 12,
+    "tgftp.nws.noaa.gov": 4,
+}
+DEFAULT_HOST_CONCURRENCY = 6
+
+async def fetch_listing(session, url):
+    """Fetch a directory listing and return the data file names it links to."""
+    try:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return parse_listing(await response.text())
+    except aiohttp.ClientError as e:
+        print(f"❌ Error accessing {url}: {e}")
+        return []
+
+async def list_dataset_files(session, dataset_name, dataset_info):
+    """List every file of a dataset, fetching the yearly listings concurrently."""
+    dataset_dir = os.path.join(OUTPUT_DIR, dataset_name)
+    ensure_directory_exists(dataset_dir)
+
+    if dataset_info["years"]:
+        listings = [
+            (dataset_info["url_pattern"].format(year=year), os.path.join(dataset_dir, str(year)), year)
+            for year in dataset_info["years"]
+        ]
+    else:
+        listings = [(dataset_info["url_pattern"], dataset_dir, None)]
+
+    pages = await asyncio.gather(*(fetch_listing(session, url) for url, _, _ in listings))
+
+    file_infos = []
+    for (url, directory, year), file_names in zip(listings, pages):
+        ensure_directory_exists(directory)
+        for file_name in file_names:
+            file_infos.append({
+                "dataset": dataset_name,
+                "url": url + file_name,
+                "output_path": os.path.join(directory, file_name),
+                "year": file_year(file_name, year),
+            })
+    return file_infos
+
+def write_chunk(f, sha256, chunk):
+    f.write(chunk)
+    sha256.update(chunk)
+
+async def download_file(session, file_info, budgets, manifest):
+    """Stream one file to disk, honouring the manifest validators and the byte budgets."""
+    url, output_path = file_info["url"], file_info["output_path"]
+    part_path = output_path + ".part"
+    file_name = os.path.basename(output_path)
+    reserved = written = resume_from = 0
+    started = time.perf_counter()
+    try:
+        headers, resume_from = build_request_headers(manifest.get(url), output_path, part_path)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304:
+                # Unchanged files still occupy their share of the disk allocation
+                for budget in budgets:
+                    budget.charge(manifest.get(url).get("size", 0))
+                print(f"⏭️ Unchanged: {url}")
+                return 0
+            if response.status == 416:
+                # The partial file is stale or already complete: start over
+                with contextlib.suppress(FileNotFoundError):
+                    await asyncio.to_thread(os.remove, part_path)
+                telemetry.count("download", file_name, retries=1)
+                return await download_file(session, file_info, budgets, manifest)
+            response.raise_for_status()
+
+            if response.status == 206:
+                mode, sha256 = "ab", await asyncio.to_thread(file_sha256, part_path)
+            else:
+                mode, sha256, resume_from = "wb", hashlib.sha256(), 0
+
+            file_size = response.content_length or 0
+            exceeded = reserve(budgets, resume_from + file_size)
+            if exceeded:
+                print(f"⚠️ Skipping {url}: File would exceed the {exceeded.name} limit.")
+                return 0
+            reserved = resume_from + file_size
+
+            # Record validators before streaming so an interrupted transfer can resume
+            await asyncio.to_thread(
+                manifest.update,
+                url,
+                path=output_path,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                complete=False,
+            )
+
+            # Disk writes, hashing and the manifest run in threads so they never stall other transfers
+            f = await asyncio.to_thread(open, part_path, mode)
+            try:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    if resume_from + written + len(chunk) > reserved:
+                        # Unknown or wrong Content-Length: grow the reservation as bytes arrive
+                        extra = resume_from + written + len(chunk) - reserved
+                        exceeded = reserve(budgets, extra)
+                        if exceeded:
+                            print(f"⚠️ Stopped {url}: File exceeds the {exceeded.name} limit (partial kept for resume).")
+                            return written
+                        reserved += extra
+                    await asyncio.to_thread(write_chunk, f, sha256, chunk)
+                    written += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.replace, part_path, output_path)
+
+        await asyncio.to_thread(manifest.update, url, size=resume_from + written, sha256=sha256.hexdigest(), complete=True)
+        resumed = f", resumed at {log_file_size(resume_from)}" if resume_from else ""
+        print(f"✅ Downloaded: {url} ({log_file_size(written)}{resumed})")
+        telemetry.record("download", file_name, size=written, seconds=time.perf_counter() - started)
+        return written
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        # OSError: the .part file could not be written (disk full, permissions)
+        print(f"❌ Error downloading {url}: {e}")
+        telemetry.record("download", file_name, size=written, seconds=time.perf_counter() - started, errors=1)
+        # Give back what was reserved but never written; the resumed prefix stays on disk
+        for budget in budgets:
+            budget.release(max(reserved - resume_from - written, 0))
+        return written
+
+async def host_worker(session, queue, dataset_budgets, run_budget, manifest, totals):
+    """Download files from one host's queue until it is empty."""
+    while True:
+        try:
+            file_info = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        budgets = (dataset_budgets[file_info["dataset"]], run_budget)
+        # Do not start new transfers once a budget is used up
+        if all(budget.remaining() > 0 for budget in budgets):
+            written = await download_file(session, file_info, budgets, manifest)
+            totals[file_info["dataset"]] += written
+
+async def download_all(datasets=DATASETS):
+    """Fetch every listing at once, then download with a concurrency cap per host."""
+    ensure_directory_exists(OUTPUT_DIR)
+    manifest = Manifest(MANIFEST_PATH)
+    run_budget = ByteBudget("run", MAX_RUN_SIZE_GB * BYTES_IN_GB)
+    dataset_budgets = {
+        name: ByteBudget(f"{name} dataset", MAX_DATASET_SIZE_GB * BYTES_IN_GB) for name in datasets
+    }
+    totals = {name: 0 for name in datasets}
+
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=0)  # Limits are enforced per host below
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        listings = await asyncio.gather(*(
+            list_dataset_files(session, name, info) for name, info in datasets.items()
+        ))
+
+        # One newest-first queue per host
+        queues = {}
+        file_infos = sorted((f for files in listings for f in files), key=lambda f: -(f["year"] or 0))
+        for file_info in file_infos:
+            host = urlsplit(file_info["url"]).hostname
+            queues.setdefault(host, asyncio.Queue()).put_nowait(file_info)
+
+        workers = []
+        for host, queue in queues.items():
+            concurrency = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+            workers.extend(
+                host_worker(session, queue, dataset_budgets, run_budget, manifest, totals)
+                for _ in range(concurrency)
+            )
+        await asyncio.gather(*workers)
+    await asyncio.to_thread(manifest.flush)
+
+    for name, total in totals.items():
+        print(f"✅ Finished {name}: Total size downloaded = {log_file_size(total)}")
+
+def main():
+    telemetry.start("download")
+    asyncio.run(download_all())
+    telemetry.finish()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 import os
+import re
+import json
+import time
+import atexit
+import contextlib
+import hashlib
+import sys
+import threading
+from html.parser import HTMLParser
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from telemetry import telemetry
 
 # Configuration
 DATASETS = {
@@ -22,8 +32,44 @@ DATASETS = {
     },
 }
 OUTPUT_DIR = "./data/raw"
+# "async" (download_async.py, per-host concurrency caps) or "threads" (adaptive DownloadScheduler);
+# overridden by `--engine=async|threads` on the command line
+DOWNLOAD_ENGINE = os.getenv("DOWNLOAD_ENGINE", "async")
+DOWNLOAD_ENGINES = ("async", "threads")
 MAX_DATASET_SIZE_GB = 10
+MAX_RUN_SIZE_GB = 30
 BYTES_IN_GB = 1024 * 1024 * 1024
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+MANIFEST_FLUSH_SECONDS = 5  # Updates are batched on disk at most this often, and at exit
+CHUNK_SIZE = 1024 * 1024
+REQUEST_TIMEOUT = 60
+
+# Scheduler configuration: concurrency adapts between these bounds
+MIN_WORKERS = 2
+MAX_WORKERS = 16
+ADAPT_INTERVAL_SECONDS = 5
+STORM_EVENTS_YEAR = re.compile(r"_d(\d{4})_")
+
+class ListingParser(HTMLParser):
+    """Collect the data file links (.csv/.txt) of an HTML directory listing."""
+
+    def __init__(self):
+        super().__init__()
+        self.files = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        href = dict(attrs).get("href") or ""
+        if (".csv" in href or ".txt" in href) and "/" not in href:
+            self.files.append(href)
+
+def parse_listing(html):
+    """Return the data file names linked from a directory listing page."""
+    parser = ListingParser()
+    parser.feed(html)
+    parser.close()
+    return parser.files
 
 def ensure_directory_exists(directory):
     if not os.path.exists(directory):
@@ -33,33 +79,263 @@ def log_file_size(file_size):
     file_size_mb = file_size / (1024 * 1024)
     return f"{file_size_mb:.2f} MB" if file_size_mb < 1024 else f"{file_size_mb / 1024:.2f} GB"
 
-def download_file(file_info):
-    url, output_path, current_size, size_limit = file_info
+class Manifest:
+    """Local record of downloaded files (size, validators, checksum), keyed by URL.
+
+    Updates are applied in memory and written out every
+    MANIFEST_FLUSH_SECONDS, on `flush()` and at interpreter exit, rather than
+    rewriting the whole file on every change.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        self.flushed_at = time.monotonic()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+        atexit.register(self.flush)
+
+    def get(self, url):
+        with self.lock:
+            return dict(self.entries.get(url, {}))
+
+    def update(self, url, **fields):
+        with self.lock:
+            self.entries.setdefault(url, {}).update(fields)
+            self.dirty = True
+            if time.monotonic() - self.flushed_at >= MANIFEST_FLUSH_SECONDS:
+                self._write()
+
+    def flush(self):
+        with self.lock:
+            if self.dirty:
+                self._write()
+
+    def _write(self):
+        # Write to a temporary file first so a crash never leaves a truncated manifest
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        self.flushed_at = time.monotonic()
+
+class ByteBudget:
+    """Thread-safe byte allowance shared by every transfer it covers."""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def try_reserve(self, size):
+        with self.lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def charge(self, size):
+        """Account for bytes that are already on disk, even past the limit."""
+        with self.lock:
+            self.used += size
+
+    def release(self, size):
+        with self.lock:
+            self.used -= size
+
+    def remaining(self):
+        with self.lock:
+            return self.limit - self.used
+
+def reserve(budgets, size):
+    """Reserve `size` bytes on every budget, or on none of them."""
+    reserved = []
+    for budget in budgets:
+        if not budget.try_reserve(size):
+            for taken in reserved:
+                taken.release(size)
+            return budget
+        reserved.append(budget)
+    return None
+
+def file_sha256(path):
+    """Return a running SHA-256 hash seeded with the content of an existing file."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256
+
+def build_request_headers(entry, output_path, part_path):
+    """Return (headers, resume_from) for a conditional or ranged request."""
+    etag = entry.get("etag")
+    last_modified = entry.get("last_modified")
+
+    if entry.get("complete") and os.path.exists(output_path) and os.path.getsize(output_path) == entry.get("size"):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers, 0
+
+    if os.path.exists(part_path) and (etag or last_modified):
+        resume_from = os.path.getsize(part_path)
+        # If-Range needs a strong validator; fall back to Last-Modified for weak ETags
+        validator = etag if etag and not etag.startswith("W/") else last_modified
+        if resume_from and validator:
+            return {"Range": f"bytes={resume_from}-", "If-Range": validator}, resume_from
+
+    return {}, 0
+
+def download_file(file_info, budgets, manifest, on_progress=None):
+    url, output_path = file_info["url"], file_info["output_path"]
+    part_path = output_path + ".part"
+    file_name = os.path.basename(output_path)
+    reserved = written = resume_from = 0
+    started = time.perf_counter()
     try:
-        response = requests.get(url, stream=True)
+        headers, resume_from = build_request_headers(manifest.get(url), output_path, part_path)
+        response = requests.get(url, stream=True, headers=headers, timeout=REQUEST_TIMEOUT)
+
+        if response.status_code == 304:
+            # Unchanged files still occupy their share of the disk allocation
+            for budget in budgets:
+                budget.charge(manifest.get(url).get("size", 0))
+            print(f"⏭️ Unchanged: {url}")
+            return 0
+        if response.status_code == 416:
+            # The partial file is stale or already complete: start over
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(part_path)
+            telemetry.count("download", file_name, retries=1)
+            return download_file(file_info, budgets, manifest, on_progress)
         response.raise_for_status()
 
+        if response.status_code == 206:
+            mode, sha256 = "ab", file_sha256(part_path)
+        else:
+            mode, sha256, resume_from = "wb", hashlib.sha256(), 0
+
+        # Reserve the whole file up front when its size is known
         file_size = int(response.headers.get('Content-Length', 0))
-        if current_size + file_size > size_limit:
-            print(f"⚠️ Skipping {url}: File would exceed dataset limit.")
-            return file_size
+        exceeded = reserve(budgets, resume_from + file_size)
+        if exceeded:
+            response.close()
+            print(f"⚠️ Skipping {url}: File would exceed the {exceeded.name} limit.")
+            return 0
+        reserved = resume_from + file_size
+
+        # Record validators before streaming so an interrupted transfer can resume
+        manifest.update(
+            url,
+            path=output_path,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            complete=False,
+        )
 
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=1024):
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if resume_from + written + len(chunk) > reserved:
+                    # Unknown or wrong Content-Length: grow the reservation as bytes arrive
+                    extra = resume_from + written + len(chunk) - reserved
+                    exceeded = reserve(budgets, extra)
+                    if exceeded:
+                        response.close()
+                        print(f"⚠️ Stopped {url}: File exceeds the {exceeded.name} limit (partial kept for resume).")
+                        return written
+                    reserved += extra
                 f.write(chunk)
+                sha256.update(chunk)
+                written += len(chunk)
+                if on_progress:
+                    on_progress(len(chunk))
+        os.replace(part_path, output_path)
 
-        print(f"✅ Downloaded: {url} ({log_file_size(file_size)})")
-        return file_size
-    except requests.exceptions.RequestException as e:
+        manifest.update(url, size=resume_from + written, sha256=sha256.hexdigest(), complete=True)
+        resumed = f", resumed at {log_file_size(resume_from)}" if resume_from else ""
+        print(f"✅ Downloaded: {url} ({log_file_size(written)}{resumed})")
+        telemetry.record("download", file_name, size=written, seconds=time.perf_counter() - started)
+        return written
+    except (requests.exceptions.RequestException, OSError) as e:
+        # OSError: the .part file could not be written (disk full, permissions)
         print(f"❌ Error downloading {url}: {e}")
-        return 0
+        telemetry.record("download", file_name, size=written, seconds=time.perf_counter() - started, errors=1)
+        # Give back what was reserved but never written; the resumed prefix stays on disk
+        for budget in budgets:
+            budget.release(max(reserved - resume_from - written, 0))
+        return written
+
+class DownloadScheduler:
+    """Runs downloads newest-first under shared byte budgets, adapting concurrency to throughput."""
+
+    def __init__(self, manifest, run_budget, min_workers=MIN_WORKERS, max_workers=MAX_WORKERS):
+        self.manifest = manifest
+        self.run_budget = run_budget
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.concurrency = min_workers
+        self.lock = threading.Lock()
+        self.window_bytes = 0
+        self.window_started = time.monotonic()
+        self.last_throughput = 0.0
+
+    def record_progress(self, size):
+        with self.lock:
+            self.window_bytes += size
 
-def download_dataset(dataset_name, dataset_info):
+    def adapt(self):
+        """Hill-climb: add a worker while throughput improves, drop one when it degrades."""
+        now = time.monotonic()
+        with self.lock:
+            elapsed = now - self.window_started
+            if elapsed < ADAPT_INTERVAL_SECONDS:
+                return
+            throughput = self.window_bytes / elapsed
+            self.window_bytes = 0
+            self.window_started = now
+
+        if throughput > self.last_throughput * 1.1:
+            self.concurrency = min(self.concurrency + 1, self.max_workers)
+        elif throughput < self.last_throughput * 0.9:
+            self.concurrency = max(self.concurrency - 1, self.min_workers)
+        self.last_throughput = throughput
+
+    def run(self, file_infos, dataset_budget):
+        """Download files by priority until the queue or a budget runs out. Returns bytes transferred."""
+        budgets = (dataset_budget, self.run_budget)
+        queue = sorted(file_infos, key=lambda info: -(info["year"] or 0))
+        total_bytes = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = set()
+            while queue or in_flight:
+                # Stop starting new transfers once any budget is used up
+                while queue and len(in_flight) < self.concurrency and all(b.remaining() > 0 for b in budgets):
+                    in_flight.add(executor.submit(
+                        download_file, queue.pop(0), budgets, self.manifest, self.record_progress
+                    ))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, timeout=ADAPT_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total_bytes += future.result()
+                self.adapt()
+
+        if queue:
+            print(f"⚠️ Budget reached: {len(queue)} lower-priority files were not started.")
+        return total_bytes
+
+def list_dataset_files(dataset_name, dataset_info):
+    """List the remote files of a dataset with their local path and year."""
     dataset_dir = os.path.join(OUTPUT_DIR, dataset_name)
     ensure_directory_exists(dataset_dir)
-
-    total_size_bytes = 0
-    size_limit = MAX_DATASET_SIZE_GB * BYTES_IN_GB
     file_infos = []
 
     if dataset_info["years"]:
@@ -69,41 +345,67 @@ def download_dataset(dataset_name, dataset_info):
 
             url = dataset_info["url_pattern"].format(year=year)
             try:
-                response = requests.get(url)
+                response = requests.get(url, timeout=REQUEST_TIMEOUT)
                 response.raise_for_status()
 
-                for line in response.text.splitlines():
-                    if ".csv" in line or ".txt" in line:
-                        file_name = line.split('href="')[1].split('"')[0]
-                        file_url = url + file_name
-                        output_path = os.path.join(year_dir, file_name)
-                        file_infos.append((file_url, output_path, total_size_bytes, size_limit))
+                for file_name in parse_listing(response.text):
+                    file_infos.append({
+                        "url": url + file_name,
+                        "output_path": os.path.join(year_dir, file_name),
+                        "year": file_year(file_name, year),
+                    })
             except requests.exceptions.RequestException as e:
                 print(f"❌ Error accessing {url}: {e}")
     else:
         try:
-            response = requests.get(dataset_info["url_pattern"])
+            response = requests.get(dataset_info["url_pattern"], timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
 
-            for line in response.text.splitlines():
-                if ".csv" in line or ".txt" in line:
-                    file_name = line.split('href="')[1].split('"')[0]
-                    file_url = dataset_info["url_pattern"] + file_name
-                    output_path = os.path.join(dataset_dir, file_name)
-                    file_infos.append((file_url, output_path, total_size_bytes, size_limit))
+            for file_name in parse_listing(response.text):
+                file_infos.append({
+                    "url": dataset_info["url_pattern"] + file_name,
+                    "output_path": os.path.join(dataset_dir, file_name),
+                    "year": file_year(file_name),
+                })
         except requests.exceptions.RequestException as e:
             print(f"❌ Error accessing {dataset_info['url_pattern']}: {e}")
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        results = executor.map(download_file, file_infos)
+    return file_infos
+
+def file_year(file_name, default=None):
+    """Return the data year of a file, read from storm events names (`_dYYYY_`) when present."""
+    match = STORM_EVENTS_YEAR.search(file_name)
+    return int(match.group(1)) if match else default
 
-    total_size_bytes += sum(results)
+def download_dataset(dataset_name, dataset_info, scheduler):
+    file_infos = list_dataset_files(dataset_name, dataset_info)
+    dataset_budget = ByteBudget(f"{dataset_name} dataset", MAX_DATASET_SIZE_GB * BYTES_IN_GB)
+    total_size_bytes = scheduler.run(file_infos, dataset_budget)
     print(f"✅ Finished {dataset_name}: Total size downloaded = {log_file_size(total_size_bytes)}")
 
-def main():
+def engine_from_args(args, default=DOWNLOAD_ENGINE):
+    """Return the engine chosen with `--engine=<name>`, or the configured default."""
+    engine = default
+    for arg in args:
+        if arg.startswith("--engine="):
+            engine = arg.split("=", 1)[1]
+    if engine not in DOWNLOAD_ENGINES:
+        raise SystemExit(f"Unknown download engine {engine!r}; expected one of {', '.join(DOWNLOAD_ENGINES)}")
+    return engine
+
+def main(engine=DOWNLOAD_ENGINE):
+    if engine == "async":
+        from download_async import main as async_main
+        return async_main()
+
+    telemetry.start("download")
     ensure_directory_exists(OUTPUT_DIR)
+    manifest = Manifest(MANIFEST_PATH)
+    scheduler = DownloadScheduler(manifest, ByteBudget("run", MAX_RUN_SIZE_GB * BYTES_IN_GB))
     for dataset_name, dataset_info in DATASETS.items():
-        download_dataset(dataset_name, dataset_info)
+        download_dataset(dataset_name, dataset_info, scheduler)
+    manifest.flush()
+    telemetry.finish()
 
 if __name__ == "__main__":
-    main()
+    main(engine_from_args(sys.argv[1:]))
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import connections
+
+# Index settings while bulk loading, and once the index serves queries. The serving values
+# default to a single-node cluster (no replicas); set ES_REPLICAS=1 or more on a real cluster
+LOAD_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0}
+SERVING_SETTINGS = {
+    "refresh_interval": os.getenv("ES_REFRESH_INTERVAL", "1s"),
+    "number_of_replicas": int(os.getenv("ES_REPLICAS", "0")),
+}
+YEAR_INDEX_SHARDS = 1
+FORCE_MERGE_SEGMENTS = 1
+UNDATED = "undated"  # Index suffix for documents without a year
+# geo_point field -> the (lat, lon) columns it is built from at index time
+GEO_POINTS = {"BEGIN_POINT": ("BEGIN_LAT", "BEGIN_LON"), "END_POINT": ("END_LAT", "END_LON")}
+
+# NOAA's own format, and the "yyyy-MM-dd HH:mm:ss" the normalized timestamps serialize to
+DATE_FORMAT = "dd-MMM-yy HH:mm:ss||yyyy-MM-dd HH:mm:ss||strict_date_optional_time||epoch_millis"
+
+# The keyword fields the backend queries as `<FIELD>.keyword` get a sub-field of the same name
+KEYWORD = {"type": "keyword", "fields": {"keyword": {"type": "keyword"}}}
+
+STORM_EVENTS_MAPPINGS = {
+    "properties": {
+        "EVENT_ID": {"type": "long"},
+        "EPISODE_ID": {"type": "long"},
+        "YEAR": {"type": "integer"},
+        "STATE": KEYWORD,
+        "EVENT_TYPE": KEYWORD,
+        "CZ_NAME": KEYWORD,
+        "WFO": {"type": "keyword"},
+        "BEGIN_DATE_TIME": {"type": "date", "format": DATE_FORMAT},
+        "END_DATE_TIME": {"type": "date", "format": DATE_FORMAT},
+        "INJURIES_DIRECT": {"type": "integer"},
+        "INJURIES_INDIRECT": {"type": "integer"},
+        "DEATHS_DIRECT": {"type": "integer"},
+        "DEATHS_INDIRECT": {"type": "integer"},
+        "DAMAGE_PROPERTY": {"type": "float"},
+        "DAMAGE_CROPS": {"type": "float"},
+        "MAGNITUDE": {"type": "float"},
+        "MAGNITUDE_TYPE": {"type": "keyword"},
+        "FLOOD_CAUSE": {"type": "text"},
+        "CATEGORY": {"type": "keyword"},
+        "TOR_F_SCALE": {"type": "keyword"},
+        "TOR_LENGTH": {"type": "float"},
+        "TOR_WIDTH": {"type": "float"},
+        "TOR_OTHER_WFO": {"type": "keyword"},
+        "TOR_OTHER_CZ_STATE": {"type": "keyword"},
+        "TOR_OTHER_CZ_FIPS": {"type": "keyword"},
+        "TOR_OTHER_CZ_NAME": {"type": "keyword"},
+        "BEGIN_LAT": {"type": "float"},
+        "BEGIN_LON": {"type": "float"},
+        "END_LAT": {"type": "float"},
+        "END_LON": {"type": "float"},
+        "BEGIN_POINT": {"type": "geo_point"},
+        "END_POINT": {"type": "geo_point"},
+        "EPISODE_NARRATIVE": {"type": "text"},
+        "EVENT_NARRATIVE": {"type": "text"},
+        "DATA_SOURCE": {"type": "keyword"},
+    }
+}
+
+
+def geo_points(document):
+    """geo_point values of a storm event, for the coordinate pairs it has; NaN counts as missing."""
+    points = {}
+    for field, (lat_field, lon_field) in GEO_POINTS.items():
+        lat, lon = document.get(lat_field), document.get(lon_field)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            continue
+        if abs(lat) <= 90 and abs(lon) <= 180:  # Also false for NaN
+            points[field] = {"lat": lat, "lon": lon}
+    return points
+
+
+def document_year(document):
+    """Year a storm event belongs to, from YEAR or BEGIN_YEARMONTH."""
+    for field, divisor in (("YEAR", 1), ("BEGIN_YEARMONTH", 100)):
+        try:
+            return int(float(document[field])) // divisor
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def invalidate_backend_cache(index):
+    """Drop the API's cached aggregations, geo tiles and autocomplete values of an index.
+
+    The API does not have to be running while indexing: failures only warn,
+    and cached entries then expire with their TTL.
+    """
+    if not connections.BACKEND_URL:
+        return
+    try:
+        response = requests.post(
+            f"{connections.BACKEND_URL}/auth/token",
+            data={"username": connections.BACKEND_USERNAME, "password": connections.BACKEND_PASSWORD},
+            timeout=10,
+        )
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        response = requests.post(
+            f"{connections.BACKEND_URL}/protected/elasticsearch/{index}/cache/invalidate",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=60,  # Also reloads the autocomplete values of the index
+        )
+        response.raise_for_status()
+        print(f"[INFO] Invalidated the API caches of {index}")
+    except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+        print(f"[WARNING] Could not invalidate the API caches of {index}: {e}")
+
+
+class YearIndexBuild:
+    """One generation of per-year indices, loaded offline and then swapped behind a read alias.
+
+    Every year gets its own index named `<alias>-<year>-<build id>`, created on
+    the first document of that year with refresh disabled and no replicas.
+    `finish()` force-merges each index, restores the serving settings and
+    atomically points the alias at the new generation, so readers switch
+    from the previous data to the new one without ever seeing a partial load.
+    """
+
+    def __init__(self, alias, mappings=STORM_EVENTS_MAPPINGS, session=None):
+        self.alias = alias
+        self.mappings = mappings
+        self.build_id = time.strftime("%Y%m%d%H%M%S")
+        self.session = session or connections.es_session()
+        self.indices = {}
+
+    def index_for(self, document):
+        """Return (creating it if needed) the index of this build a document is routed to."""
+        year = document_year(document)
+        key = UNDATED if year is None else str(year)
+        name = self.indices.get(key)
+        if name is None:
+            name = f"{self.alias}-{key}-{self.build_id}"
+            self.create_index(name)
+            self.indices[key] = name
+        return name
+
+    def create_index(self, name, settings=LOAD_SETTINGS):
+        body = {
+            "settings": {"index": {"number_of_shards": YEAR_INDEX_SHARDS, **settings}},
+            "mappings": self.mappings,
+        }
+        response = self.session.put(f"{connections.ES_URL}/{name}", json=body)
+        response.raise_for_status()
+        print(f"[INFO] Created index {name}")
+
+    def current_indices(self):
+        """Indices the alias points to right now, and whether the alias name is a concrete (legacy) index."""
+        response = self.session.get(f"{connections.ES_URL}/_alias/{self.alias}")
+        if response.status_code == 404:
+            legacy = self.session.head(f"{connections.ES_URL}/{self.alias}").status_code == 200
+            return [], legacy
+        response.raise_for_status()
+        return sorted(response.json()), False
+
+    def finish(self):
+        """Make the new indices searchable, compact them, then swap the alias over to them."""
+        names = sorted(self.indices.values())
+        for name in names:
+            self.session.post(f"{connections.ES_URL}/{name}/_refresh").raise_for_status()
+            self.session.post(
+                f"{connections.ES_URL}/{name}/_forcemerge", params={"max_num_segments": FORCE_MERGE_SEGMENTS}
+            ).raise_for_status()
+            # Replicas are added last so they copy the merged segments
+            self.session.put(f"{connections.ES_URL}/{name}/_settings", json={"index": SERVING_SETTINGS}).raise_for_status()
+
+        previous, legacy = self.current_indices()
+        actions = [{"remove": {"index": name, "alias": self.alias}} for name in previous]
+        if legacy:
+            # A monolithic index created before aliases: it has to go in the same atomic step
+            actions.append({"remove_index": {"index": self.alias}})
+        actions.extend({"add": {"index": name, "alias": self.alias}} for name in names)
+        self.session.post(f"{connections.ES_URL}/_aliases", json={"actions": actions}).raise_for_status()
+        print(f"[INFO] Alias {self.alias} now points to {len(names)} indices of build {self.build_id}")
+
+        for name in previous:
+            if name not in names:
+                self.session.delete(f"{connections.ES_URL}/{name}")
+        invalidate_backend_cache(self.alias)
+        return names
+
+    def abort(self):
+        """Drop the indices of a failed build; the alias keeps serving the previous generation."""
+        for name in self.indices.values():
+            self.session.delete(f"{connections.ES_URL}/{name}")
+        print(f"[ERROR] Build {self.build_id} of {self.alias} aborted, alias left unchanged")
+
+
+class MissingYearIndices(Exception):
+    """The alias does not point to per-year indices that could be synced into."""
+
+
+class YearIndexSync(YearIndexBuild):
+    """Writes into the per-year indices the alias already serves, for incremental updates.
+
+    Documents go to the live index of their year; a year without an index
+    gets a new one that joins the alias right away. Fields added to the
+    mappings since the last build are added to the live indices first.
+    Raises MissingYearIndices when the alias has no per-year indices yet,
+    which calls for a full build.
+    """
+
+    def __init__(self, alias, mappings=STORM_EVENTS_MAPPINGS, session=None):
+        super().__init__(alias, mappings, session)
+        names, legacy = self.current_indices()
+        if not names or legacy:
+            raise MissingYearIndices(f"{alias} does not point to per-year indices")
+        for name in names:
+            # <alias>-<year>-<build id>; later builds sort last and win
+            self.indices[name[len(alias) + 1:].rsplit("-", 1)[0]] = name
+            self.session.put(f"{connections.ES_URL}/{name}/_mapping", json=self.mappings).raise_for_status()
+        self.touched = set()
+
+    def index_for(self, document):
+        year = document_year(document)
+        key = UNDATED if year is None else str(year)
+        name = self.indices.get(key)
+        if name is None:
+            name = f"{self.alias}-{key}-{self.build_id}"
+            self.create_index(name, SERVING_SETTINGS)
+            actions = [{"add": {"index": name, "alias": self.alias}}]
+            self.session.post(f"{connections.ES_URL}/_aliases", json={"actions": actions}).raise_for_status()
+            self.indices[key] = name
+        self.touched.add(name)
+        return name
+
+    def finish(self):
+        """Refresh the indices that received documents so the changes are searchable at once."""
+        names = sorted(self.touched)
+        for name in names:
+            self.session.post(f"{connections.ES_URL}/{name}/_refresh").raise_for_status()
+        print(f"[INFO] Synced {len(names)} indices of {self.alias}")
+        if names:
+            invalidate_backend_cache(self.alias)
+        return names
+
+    def abort(self):
+        """Leave the live indices in place; documents already written are rewritten by the next sync."""
+        print(f"[ERROR] Sync of {self.alias} aborted")
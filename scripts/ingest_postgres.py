@@ -1,15 +1,23 @@
+import io
 import os
-import pandas as pd
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import psycopg2
-from sqlalchemy import create_engine
+from psycopg2 import sql
+import pyarrow.csv as pv
+import connections
+import postgres_schema
+from stage_parquet import LOAD_YEARS, staged_fragments, iter_staged_batches, fragment_source_name
+from telemetry import telemetry
 
-DB_HOST = "localhost"
-DB_PORT = 5432
-DB_USER = "postgres"
-DB_PASSWORD = "password"
-DB_NAME = "noaa"
 RAW_DATA_DIR = "./data/raw"
 
+# Parallel COPY configuration, one pooled connection per worker
+LOAD_WORKERS = connections.POSTGRES_POOL_SIZE
+# Connection failures are retried; data errors fail the file at once
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
 DATASETS = {
     "gsod": {
         "folder": "gsod",
@@ -21,43 +29,166 @@ DATASETS = {
     }
 }
 
-def connect_to_postgres():
-    """Connect to PostgreSQL and return the connection object."""
-    return psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        dbname=DB_NAME
-    )
-
-def load_csv_to_postgres(dataset_name, table_name):
-    """Load a CSV file into PostgreSQL table."""
+def list_csv_files(dataset_name, years=None):
+    """Return the CSV files of a dataset, grouped by year folder, limited to `years` when given."""
     dataset_dir = os.path.join(RAW_DATA_DIR, dataset_name)
-    for year in os.listdir(dataset_dir):
+    files = []
+    for year in sorted(os.listdir(dataset_dir)):
+        if years and int(year) not in years:
+            continue
         year_dir = os.path.join(dataset_dir, year)
-        for file_name in os.listdir(year_dir):
+        for file_name in sorted(os.listdir(year_dir)):
             if file_name.endswith('.csv'):
-                file_path = os.path.join(year_dir, file_name)
-                print(f"[INFO] Loading {file_path} into {table_name}...")
-                df = pd.read_csv(file_path)
-                
-                # Create connection to the PostgreSQL database
-                conn = connect_to_postgres()
-                engine = create_engine(f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
-                
-                try:
-                    df.to_sql(table_name, engine, if_exists="append", index=False)
-                    print(f"[INFO] Successfully loaded {file_name} into {table_name}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to load {file_name} into {table_name}: {e}")
-                finally:
-                    conn.close()
+                files.append(os.path.join(year_dir, file_name))
+    return files
+
+def source_columns(source):
+    """Header of a raw CSV path or column names of a staged fragment."""
+    if isinstance(source, str):
+        with open(source, newline='') as f:
+            return next(csv.reader(f))
+    return source.physical_schema.names
+
+def source_year(source):
+    """Year of a raw CSV path (`<dataset>/<year>/`) or staged fragment (`<dataset>/year=<year>/`)."""
+    path = source if isinstance(source, str) else source.path
+    return int(os.path.basename(os.path.dirname(path)).split("=")[-1])
+
+def ensure_table(pool, table_name, sources):
+    """Create the typed, partitioned table with a partition per source year and the columns the sources bring.
+
+    All DDL runs once before the parallel COPY, so the workers never wait on
+    each other's table locks.
+    """
+    columns = list(dict.fromkeys(column for source in sources for column in source_columns(source)))
+    conn = pool.getconn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                postgres_schema.create_table(cur, table_name)
+                postgres_schema.create_partitions(cur, table_name, {source_year(source) for source in sources})
+                postgres_schema.add_columns(cur, table_name, columns)
+    finally:
+        pool.putconn(conn)
+
+class ArrowCsvStream(io.RawIOBase):
+    """File-like object rendering Arrow record batches as CSV text, one batch at a time, for COPY."""
+
+    def __init__(self, batches):
+        self.batches = iter(batches)
+        self.buffer = b""
+        self.header = True
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            batch = next(self.batches, None)
+            if batch is None:
+                break
+            sink = io.BytesIO()
+            pv.write_csv(batch, sink, write_options=pv.WriteOptions(include_header=self.header))
+            self.header = False
+            self.buffer += sink.getvalue()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+def copy_stream(pool, stream, columns, table_name):
+    """COPY a CSV stream into a table inside its own transaction. Returns the row count."""
+    # Empty fields of typed columns are NULL even when quoted, as GSOD quotes every field
+    typed = [column for column in postgres_schema.typed_columns(table_name) if column in columns]
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true{})").format(
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+        sql.SQL(", FORCE_NULL ({})").format(sql.SQL(", ").join(map(sql.Identifier, typed))) if typed else sql.SQL("")
+    )
+    conn = pool.getconn()
+    broken = False
+    try:
+        with conn:  # Commits on success, rolls back this file only on failure
+            with conn.cursor() as cur:
+                cur.copy_expert(statement, stream)
+                return cur.rowcount
+    except TRANSIENT_ERRORS:
+        broken = True
+        raise
+    finally:
+        # A connection that failed is dropped rather than handed to the next file
+        pool.putconn(conn, close=broken)
+
+def copy_file(pool, file_path, table_name):
+    """COPY one raw CSV file into a table. Returns the row count."""
+    with open(file_path, newline='') as f:
+        columns = next(csv.reader(f))
+        f.seek(0)
+        return copy_stream(pool, f, columns, table_name)
+
+def copy_fragment(pool, fragment, table_name):
+    """COPY one staged Parquet file into a table, re-encoding its typed batches as CSV. Returns the row count."""
+    columns = fragment.physical_schema.names
+    # The stream carries exactly the columns of the COPY statement, in its order
+    return copy_stream(pool, ArrowCsvStream(iter_staged_batches(fragment, columns=columns)), columns, table_name)
+
+def copy_source(pool, source, table_name):
+    """COPY a raw CSV path or staged fragment, retrying connection failures. Returns the row count."""
+    path = source if isinstance(source, str) else source.path
+    copy = copy_file if isinstance(source, str) else copy_fragment
+    with telemetry.measure("copy", source_name(source), size=os.path.getsize(path)) as step:
+        def count_retry(attempt, error):
+            step.retries += 1
+            print(f"[WARNING] Retrying {source_name(source)} (attempt {attempt}): {error}")
+
+        # Each attempt is its own transaction on a fresh stream, so a retry never loads rows twice
+        step.rows = connections.retry(copy, pool, source, table_name, retry_on=TRANSIENT_ERRORS, on_retry=count_retry)
+        return step.rows
+
+def source_name(source):
+    return os.path.basename(source) if isinstance(source, str) else fragment_source_name(source)
+
+def load_csv_to_postgres(dataset_name, table_name):
+    """Load a dataset's CSV files into a PostgreSQL table with parallel COPY."""
+    # Prefer the typed Parquet staging layer written by stage_parquet.py
+    files = staged_fragments(dataset_name, LOAD_YEARS) or list_csv_files(dataset_name, LOAD_YEARS)
+    if not files:
+        print(f"[INFO] No CSV files found for {dataset_name}")
+        return
+
+    pool = connections.postgres_pool()
+    ensure_table(pool, table_name, files)
+    started = time.perf_counter()
+    loaded_rows = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+        futures = {executor.submit(copy_source, pool, source, table_name): source for source in files}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                rows = future.result()
+                loaded_rows += rows
+                print(f"[INFO] Successfully loaded {source_name(source)} into {table_name} ({rows} rows)")
+            except Exception as e:
+                print(f"[ERROR] Failed to load {source_name(source)} into {table_name}: {e}")
+                failed.append(source)
+
+    elapsed = time.perf_counter() - started
+    rate = loaded_rows / elapsed if elapsed > 0 else 0.0
+    print(f"[INFO] Loaded {loaded_rows} rows into {table_name} in {elapsed:.1f}s - {rate:.0f} rows/s")
+    if failed:
+        print(f"[ERROR] {len(failed)} files could not be loaded into {table_name}: {[source_name(source) for source in failed]}")
 
 def ingest():
     """Main function to ingest all datasets."""
-    for dataset_name, info in DATASETS.items():
-        load_csv_to_postgres(dataset_name, info["table"])
+    telemetry.start("ingest_postgres")
+    try:
+        for dataset_name, info in DATASETS.items():
+            load_csv_to_postgres(dataset_name, info["table"])
+    finally:
+        connections.close_all()
+    telemetry.finish()
 
 if __name__ == "__main__":
     ingest()
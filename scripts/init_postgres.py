@@ -1,9 +1,7 @@
 import psycopg2
+import connections
+import postgres_schema
 
-DB_HOST = "localhost"
-DB_PORT = 5432
-DB_USER = "postgres"
-DB_PASSWORD = "password"
 DB_DEFAULT_DB = "postgres"
 
 CREATE_DB_SQL = """
@@ -35,13 +33,7 @@ CREATE TABLE IF NOT EXISTS metadata (
 
 def create_database():
     print("[INFO] Connecting to the default database...")
-    conn = psycopg2.connect(
-        dbname=DB_DEFAULT_DB,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT
-    )
+    conn = connections.retry(connections.postgres_connect, DB_DEFAULT_DB, retry_on=psycopg2.OperationalError)
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
@@ -52,18 +44,15 @@ def create_database():
 
 def create_tables():
     print("[INFO] Connecting to the 'noaa' database...")
-    conn = psycopg2.connect(
-        dbname="noaa",
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT
-    )
+    conn = connections.retry(connections.postgres_connect, "noaa", retry_on=psycopg2.OperationalError)
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
             print("[INFO] Creating tables in the 'noaa' database...")
             cur.execute(CREATE_TABLES_SQL)
+            # Typed, year-partitioned GSOD/ISD tables; ingest_postgres.py adds the partitions it loads into
+            for table_name in postgres_schema.COLUMN_TYPES:
+                postgres_schema.create_table(cur, table_name)
     finally:
         conn.close()
 
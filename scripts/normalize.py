@@ -0,0 +1,90 @@
+import pandas as pd
+
+# Storm events columns, normalized column-wise on whole batches
+DAMAGE_COLUMNS = ["DAMAGE_PROPERTY", "DAMAGE_CROPS"]
+DAMAGE_MULTIPLIERS = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+CASUALTY_COLUMNS = ["INJURIES_DIRECT", "INJURIES_INDIRECT", "DEATHS_DIRECT", "DEATHS_INDIRECT"]
+INTEGER_COLUMNS = [
+    "EVENT_ID", "EPISODE_ID", "YEAR", "BEGIN_YEARMONTH", "BEGIN_DAY", "BEGIN_TIME",
+    "END_YEARMONTH", "END_DAY", "END_TIME", "STATE_FIPS", "CZ_FIPS",
+]
+FLOAT_COLUMNS = ["MAGNITUDE", "TOR_LENGTH", "TOR_WIDTH", "BEGIN_RANGE", "END_RANGE"]
+COORDINATE_COLUMNS = {"BEGIN_LAT": 90, "BEGIN_LON": 180, "END_LAT": 90, "END_LON": 180}
+# Timestamp column -> YEARMONTH column used to recover the century of the two-digit year
+TIMESTAMP_COLUMNS = {"BEGIN_DATE_TIME": "BEGIN_YEARMONTH", "END_DATE_TIME": "END_YEARMONTH"}
+TIMESTAMP_FORMAT = "%d-%b-%y %H:%M:%S"  # e.g. "28-APR-50 14:45:00"
+TEXT_COLUMNS = ["STATE", "EVENT_TYPE", "CZ_NAME", "WFO", "MAGNITUDE_TYPE", "DATA_SOURCE"]
+
+
+def parse_damage(values):
+    """Convert NOAA damage strings such as "10.00K" or "1.5M" into dollars, column-wise.
+
+    Missing, blank or unparseable values become NaN (None in documents), so
+    they stay apart from a reported "0.00K".
+    """
+    text = values.fillna("").astype(str).str.strip().str.upper()
+    amount = pd.to_numeric(text.str.extract(r"^([0-9.]+)", expand=False), errors="coerce")
+    multiplier = text.str[-1:].map(DAMAGE_MULTIPLIERS).fillna(1.0)
+    return amount * multiplier
+
+
+def parse_timestamps(values, yearmonth=None):
+    """Parse NOAA timestamps; `%y` reads "50" as 2050, so years past the event's YEARMONTH move back a century."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values.astype("string").str.strip(), format=TIMESTAMP_FORMAT, errors="coerce")
+    if yearmonth is not None:
+        too_late = (parsed.dt.year > yearmonth // 100).fillna(False).astype(bool)
+        parsed = parsed.mask(too_late, parsed[too_late] - pd.DateOffset(years=100))
+    return parsed
+
+
+def normalize_storm_events(frame):
+    """Type the columns of a batch of storm events in place of per-row cleaning.
+
+    Returns the normalized frame and the number of rows dropped for lacking
+    an EVENT_ID. Columns missing from the batch are left out.
+    """
+    frame = frame.copy()
+    present = lambda columns: [column for column in columns if column in frame.columns]
+
+    for column in present(TEXT_COLUMNS):
+        frame[column] = frame[column].astype("string").str.strip()
+    for column in present(INTEGER_COLUMNS):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").round().astype("Int64")
+    for column in present(CASUALTY_COLUMNS):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0).astype("int64")
+    for column in present(FLOAT_COLUMNS):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    for column in present(list(COORDINATE_COLUMNS)):
+        values = pd.to_numeric(frame[column], errors="coerce")
+        frame[column] = values.where(values.abs() <= COORDINATE_COLUMNS[column])
+    for column in present(DAMAGE_COLUMNS):
+        frame[column] = parse_damage(frame[column])
+    for column, yearmonth in TIMESTAMP_COLUMNS.items():
+        if column in frame.columns:
+            frame[column] = parse_timestamps(frame[column], frame.get(yearmonth))
+
+    if "EVENT_ID" not in frame.columns:
+        return frame, 0
+    valid = frame["EVENT_ID"].notna()
+    return frame[valid], int((~valid).sum())
+
+
+def to_documents(frame):
+    """Turn a normalized frame into plain dicts, with missing values as None."""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+NORMALIZERS = {
+    "storm_events": normalize_storm_events,
+}
+
+
+def normalize(frame, dataset_name):
+    """Normalize a batch of a dataset. Returns (documents, dropped rows)."""
+    normalizer = NORMALIZERS.get(dataset_name)
+    if normalizer is None:
+        return to_documents(frame), 0
+    frame, dropped = normalizer(frame)
+    return to_documents(frame), dropped
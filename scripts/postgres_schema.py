@@ -0,0 +1,118 @@
+from psycopg2 import sql
+
+# Column types of the GSOD/ISD tables. Columns a file brings that are not
+# listed here (ISD's optional sections) are added as TEXT when first loaded.
+COLUMN_TYPES = {
+    "gsod_data": {
+        "STATION": "TEXT NOT NULL",  # 11 characters with leading zeros, e.g. "01001099999"
+        "DATE": "DATE NOT NULL",
+        "LATITUDE": "DOUBLE PRECISION",
+        "LONGITUDE": "DOUBLE PRECISION",
+        "ELEVATION": "DOUBLE PRECISION",
+        "NAME": "TEXT",
+        "TEMP": "DOUBLE PRECISION",
+        "TEMP_ATTRIBUTES": "SMALLINT",
+        "DEWP": "DOUBLE PRECISION",
+        "DEWP_ATTRIBUTES": "SMALLINT",
+        "SLP": "DOUBLE PRECISION",
+        "SLP_ATTRIBUTES": "SMALLINT",
+        "STP": "DOUBLE PRECISION",
+        "STP_ATTRIBUTES": "SMALLINT",
+        "VISIB": "DOUBLE PRECISION",
+        "VISIB_ATTRIBUTES": "SMALLINT",
+        "WDSP": "DOUBLE PRECISION",
+        "WDSP_ATTRIBUTES": "SMALLINT",
+        "MXSPD": "DOUBLE PRECISION",
+        "GUST": "DOUBLE PRECISION",
+        "MAX": "DOUBLE PRECISION",
+        "MAX_ATTRIBUTES": "TEXT",
+        "MIN": "DOUBLE PRECISION",
+        "MIN_ATTRIBUTES": "TEXT",
+        "PRCP": "DOUBLE PRECISION",
+        "PRCP_ATTRIBUTES": "TEXT",
+        "SNDP": "DOUBLE PRECISION",
+        "FRSHTT": "TEXT",  # Six 0/1 flags, leading zeros matter
+    },
+    "isd_data": {
+        "STATION": "TEXT NOT NULL",
+        "DATE": "TIMESTAMP NOT NULL",
+        "SOURCE": "TEXT",
+        "LATITUDE": "DOUBLE PRECISION",
+        "LONGITUDE": "DOUBLE PRECISION",
+        "ELEVATION": "DOUBLE PRECISION",
+        "NAME": "TEXT",
+        "REPORT_TYPE": "TEXT",
+        "CALL_SIGN": "TEXT",
+        "QUALITY_CONTROL": "TEXT",
+        "WND": "TEXT",
+        "CIG": "TEXT",
+        "VIS": "TEXT",
+        "TMP": "TEXT",
+        "DEW": "TEXT",
+        "SLP": "TEXT",
+    },
+}
+PARTITION_COLUMN = "DATE"  # Both tables are range-partitioned by year on it
+STATION_COLUMN = "STATION"
+
+
+def partition_name(table_name, year):
+    return f"{table_name}_{year}"
+
+
+def typed_columns(table_name):
+    """Columns of a table whose type is not TEXT (COPY reads their empty fields as NULL)."""
+    return [column for column, column_type in COLUMN_TYPES[table_name].items() if not column_type.startswith("TEXT")]
+
+
+def is_partitioned(cur, table_name):
+    """True if the table exists and is partitioned, False if it is a plain table, None if it does not exist."""
+    cur.execute("SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(%s)", (table_name,))
+    row = cur.fetchone()
+    return None if row is None else row[0] == "p"
+
+
+def create_table(cur, table_name):
+    """Create a partitioned table with its station index if it does not exist yet.
+
+    The B-tree on (STATION, DATE) is declared on the parent, so every yearly
+    partition gets its own. Date bounds are served by partition pruning: rows
+    arrive one station file at a time, not in date order, so a BRIN index on
+    DATE would cover the whole year in every block range.
+    """
+    partitioned = is_partitioned(cur, table_name)
+    if partitioned is False:
+        raise RuntimeError(
+            f"{table_name} is an unpartitioned table from an older loader; drop it and reload the dataset"
+        )
+    columns = sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(column), sql.SQL(column_type))
+        for column, column_type in COLUMN_TYPES[table_name].items()
+    )
+    cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} ({}) PARTITION BY RANGE ({})").format(
+        sql.Identifier(table_name), columns, sql.Identifier(PARTITION_COLUMN)
+    ))
+    cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({}, {})").format(
+        sql.Identifier(f"{table_name}_station_idx"), sql.Identifier(table_name),
+        sql.Identifier(STATION_COLUMN), sql.Identifier(PARTITION_COLUMN)
+    ))
+
+
+def create_partitions(cur, table_name, years):
+    """Create the yearly partitions of a table that do not exist yet."""
+    for year in sorted(set(years)):
+        cur.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)").format(
+            sql.Identifier(partition_name(table_name, year)), sql.Identifier(table_name)
+        ), (f"{year}-01-01", f"{year + 1}-01-01"))
+
+
+def add_columns(cur, table_name, columns):
+    """Add the columns the files bring that the table lacks, as TEXT (they reach every partition)."""
+    cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table_name,))
+    existing = {row[0] for row in cur.fetchall()}
+    for column in columns:
+        if column not in existing:
+            existing.add(column)
+            cur.execute(sql.SQL("ALTER TABLE {} ADD COLUMN IF NOT EXISTS {} TEXT").format(
+                sql.Identifier(table_name), sql.Identifier(column)
+            ))
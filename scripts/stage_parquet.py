@@ -0,0 +1,214 @@
+import os
+import re
+import csv
+import gzip
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from telemetry import telemetry
+
+RAW_DATA_DIR = "./data/raw"
+STAGED_DATA_DIR = "./data/staged"
+COMPRESSION = "zstd"
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+STORM_EVENTS_YEAR = re.compile(r"_d(\d{4})_")
+
+
+def parse_years(value):
+    """Years of a `2015-2016` range or a `2015,2016` list; None (every year) when empty."""
+    years = set()
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        first, _, last = part.partition("-")
+        years.update(range(int(first), int(last or first) + 1))
+    return years or None
+
+
+# Years the Mongo and Postgres loaders read, e.g. LOAD_YEARS=2015-2016; every year when unset
+LOAD_YEARS = parse_years(os.getenv("LOAD_YEARS", ""))
+
+# Column types per dataset; every other column is staged as a string
+SCHEMAS = {
+    "gsod": {
+        "DATE": pa.date32(),
+        "LATITUDE": pa.float64(),
+        "LONGITUDE": pa.float64(),
+        "ELEVATION": pa.float64(),
+        "TEMP": pa.float64(),
+        "TEMP_ATTRIBUTES": pa.int32(),
+        "DEWP": pa.float64(),
+        "DEWP_ATTRIBUTES": pa.int32(),
+        "SLP": pa.float64(),
+        "SLP_ATTRIBUTES": pa.int32(),
+        "STP": pa.float64(),
+        "STP_ATTRIBUTES": pa.int32(),
+        "VISIB": pa.float64(),
+        "VISIB_ATTRIBUTES": pa.int32(),
+        "WDSP": pa.float64(),
+        "WDSP_ATTRIBUTES": pa.int32(),
+        "MXSPD": pa.float64(),
+        "GUST": pa.float64(),
+        "MAX": pa.float64(),
+        "MIN": pa.float64(),
+        "PRCP": pa.float64(),
+        "SNDP": pa.float64(),
+    },
+    "isd": {
+        "DATE": pa.timestamp("s"),
+        "LATITUDE": pa.float64(),
+        "LONGITUDE": pa.float64(),
+        "ELEVATION": pa.float64(),
+    },
+    "storm_events": {
+        "BEGIN_YEARMONTH": pa.int32(),
+        "BEGIN_DAY": pa.int32(),
+        "BEGIN_TIME": pa.int32(),
+        "END_YEARMONTH": pa.int32(),
+        "END_DAY": pa.int32(),
+        "END_TIME": pa.int32(),
+        "EPISODE_ID": pa.int64(),
+        "EVENT_ID": pa.int64(),
+        "STATE_FIPS": pa.int32(),
+        "YEAR": pa.int32(),
+        "CZ_FIPS": pa.int32(),
+        "INJURIES_DIRECT": pa.int32(),
+        "INJURIES_INDIRECT": pa.int32(),
+        "DEATHS_DIRECT": pa.int32(),
+        "DEATHS_INDIRECT": pa.int32(),
+        "MAGNITUDE": pa.float64(),
+        "TOR_LENGTH": pa.float64(),
+        "TOR_WIDTH": pa.float64(),
+        "BEGIN_RANGE": pa.float64(),
+        "END_RANGE": pa.float64(),
+        "BEGIN_LAT": pa.float64(),
+        "BEGIN_LON": pa.float64(),
+        "END_LAT": pa.float64(),
+        "END_LON": pa.float64(),
+    },
+}
+
+
+def list_raw_files(dataset_name):
+    """Return (year, path) for every raw CSV of a dataset."""
+    dataset_dir = os.path.join(RAW_DATA_DIR, dataset_name)
+    files = []
+    for entry in sorted(os.listdir(dataset_dir)):
+        path = os.path.join(dataset_dir, entry)
+        if os.path.isdir(path):
+            files.extend((int(entry), os.path.join(path, name)) for name in sorted(os.listdir(path)) if ".csv" in name)
+        elif ".csv" in entry:
+            match = STORM_EVENTS_YEAR.search(entry)
+            if match:
+                files.append((int(match.group(1)), path))
+    return files
+
+
+def staged_path(dataset_name, year, source_path):
+    """One Parquet file per source file, in a hive-style `year=` partition."""
+    stem = os.path.basename(source_path).split(".csv")[0]
+    return os.path.join(STAGED_DATA_DIR, dataset_name, f"year={year}", f"{stem}.parquet")
+
+
+def read_header(source_path):
+    opener = gzip.open if source_path.endswith(".gz") else open
+    with opener(source_path, "rt", newline="") as f:
+        return next(csv.reader(f))
+
+
+def convert_batch(batch, schema):
+    """Cast the string columns of a CSV batch to the staged types (NOAA pads numbers with spaces)."""
+    columns = []
+    for field, column in zip(schema, batch.columns):
+        if field.type != pa.string():
+            trimmed = pc.utf8_trim_whitespace(column)
+            trimmed = pc.if_else(pc.equal(trimmed, ""), pa.scalar(None, pa.string()), trimmed)
+            column = pc.cast(trimmed, field.type)
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def stage_file(dataset_name, year, source_path):
+    """Convert one CSV into a typed, compressed Parquet file, streaming block by block."""
+    output_path = staged_path(dataset_name, year, source_path)
+    if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(source_path):
+        return 0  # Already staged and up to date
+
+    known = SCHEMAS.get(dataset_name, {})
+    header = read_header(source_path)
+    schema = pa.schema([(column, known.get(column, pa.string())) for column in header])
+    reader = pv.open_csv(
+        source_path,
+        read_options=pv.ReadOptions(block_size=READ_BLOCK_SIZE),
+        convert_options=pv.ConvertOptions(
+            column_types={column: pa.string() for column in header}, strings_can_be_null=True
+        ),
+    )
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # A dot-prefixed name is skipped by ds.dataset, so readers never see a half-written file
+    tmp_path = os.path.join(os.path.dirname(output_path), "." + os.path.basename(output_path) + ".tmp")
+    source_size = os.path.getsize(source_path)
+    with telemetry.measure("stage", os.path.basename(source_path), size=source_size) as step:
+        with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+            for batch in reader:
+                writer.write_batch(convert_batch(batch, schema))
+                step.rows += batch.num_rows
+    os.replace(tmp_path, output_path)
+    return step.rows
+
+
+def stage_dataset(dataset_name):
+    """Stage every raw CSV of a dataset that changed since it was last staged."""
+    started = time.perf_counter()
+    staged_rows = 0
+    for year, source_path in list_raw_files(dataset_name):
+        try:
+            staged_rows += stage_file(dataset_name, year, source_path)
+        except (pa.ArrowInvalid, OSError) as e:
+            print(f"[ERROR] Failed to stage {source_path}: {e}")
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] Staged {staged_rows} {dataset_name} rows in {elapsed:.1f}s")
+
+
+def staged_fragments(dataset_name, years=None):
+    """Return the staged Parquet files of a dataset (one per source file), pruned to `years`.
+
+    Only the `year=` partition directories of those years are listed.
+
+    Returns an empty list when the dataset has not been staged, so loaders
+    can fall back to the raw CSV files.
+    """
+    path = os.path.join(STAGED_DATA_DIR, dataset_name)
+    if not os.path.isdir(path):
+        return []
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    partition_filter = ds.field("year").isin(list(years)) if years else None
+    return sorted(dataset.get_fragments(filter=partition_filter), key=lambda fragment: fragment.path)
+
+
+def iter_staged_batches(fragment, columns=None, batch_size=64 * 1024):
+    """Read record batches from a staged file; Parquet only decodes the projected `columns`."""
+    if columns is not None:
+        present = set(fragment.physical_schema.names)
+        columns = [column for column in columns if column in present]
+    return fragment.to_batches(columns=columns, batch_size=batch_size)
+
+
+def fragment_source_name(fragment):
+    """Name of the CSV a staged file was converted from, so both load paths report and key files alike."""
+    return os.path.basename(fragment.path)[:-len(".parquet")] + ".csv"
+
+
+def stage():
+    """Stage every downloaded dataset."""
+    telemetry.start("stage_parquet")
+    for dataset_name in SCHEMAS:
+        if os.path.isdir(os.path.join(RAW_DATA_DIR, dataset_name)):
+            stage_dataset(dataset_name)
+    telemetry.finish()
+
+
+if __name__ == "__main__":
+    stage()
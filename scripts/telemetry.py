@@ -0,0 +1,215 @@
+import os
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORTS_DIR = "./data/reports"
+# Port of the live Prometheus text endpoint; 0 (the default) keeps it off
+METRICS_PORT = int(os.getenv("TELEMETRY_PORT", "0"))
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class StageStats:
+    """Counters of one stage (e.g. "download", "parse", "write"), overall or for a single file."""
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.latencies = []  # Seconds per batch
+        self.first_started = None
+        self.last_finished = None
+
+    def count(self, retries=0, errors=0):
+        self.retries += retries
+        self.errors += errors
+
+    def add(self, rows, size, retries, errors, started, seconds):
+        self.rows += rows
+        self.bytes += size
+        self.count(retries, errors)
+        self.latencies.append(seconds)
+        if self.first_started is None or started < self.first_started:
+            self.first_started = started
+        finished = started + seconds
+        if self.last_finished is None or finished > self.last_finished:
+            self.last_finished = finished
+
+    def summary(self):
+        # Wall time spans the first to the last batch, so overlapping batches are not counted twice
+        wall = (self.last_finished - self.first_started) if self.latencies else 0.0
+        latencies = sorted(self.latencies)
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "batches": len(latencies),
+            "retries": self.retries,
+            "errors": self.errors,
+            "busy_seconds": round(sum(latencies), 3),
+            "wall_seconds": round(wall, 3),
+            "rows_per_second": round(self.rows / wall, 1) if wall > 0 else 0.0,
+            "bytes_per_second": round(self.bytes / wall, 1) if wall > 0 else 0.0,
+            "batch_seconds": {
+                **{f"p{p}": round(percentile(latencies, p), 4) for p in PERCENTILES},
+                "max": round(latencies[-1], 4) if latencies else 0.0,
+            },
+        }
+
+
+class Batch:
+    """Mutable result of a measured batch; fill in what the batch processed before it ends.
+
+    `errors` counts failed items (rows, documents or files), `retries` resent attempts.
+    """
+
+    def __init__(self, rows=0, size=0):
+        self.rows = rows
+        self.bytes = size
+        self.retries = 0
+        self.errors = 0
+
+
+class Telemetry:
+    """Per-stage and per-file throughput of one pipeline run, shared by every script.
+
+    Each script calls `start(<name>)` once, records batches with `measure()`
+    or `record()` from any thread, and calls `finish()`, which prints a
+    per-stage summary and writes the JSON run report to REPORTS_DIR.
+    """
+
+    def __init__(self):
+        self.run_name = None
+        self.started = None
+        self.stages = {}  # stage -> StageStats
+        self.files = {}  # (stage, file) -> StageStats
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self, run_name, metrics_port=METRICS_PORT):
+        self.run_name = run_name
+        self.started = time.time()
+        if metrics_port and self.server is None:
+            self.serve(metrics_port)
+
+    def record(self, stage, file=None, rows=0, size=0, seconds=0.0, retries=0, errors=0, started=None):
+        """Record one batch of a stage. `size` is in bytes."""
+        if started is None:
+            started = time.time() - seconds
+        with self.lock:
+            self.stages.setdefault(stage, StageStats()).add(rows, size, retries, errors, started, seconds)
+            if file is not None:
+                self.files.setdefault((stage, file), StageStats()).add(rows, size, retries, errors, started, seconds)
+
+    def count(self, stage, file=None, retries=0, errors=0):
+        """Count retries or failed items outside of a timed batch."""
+        with self.lock:
+            self.stages.setdefault(stage, StageStats()).count(retries, errors)
+            if file is not None:
+                self.files.setdefault((stage, file), StageStats()).count(retries, errors)
+
+    @contextmanager
+    def measure(self, stage, file=None, rows=0, size=0):
+        """Time a batch: `with telemetry.measure("write", name) as batch: ...; batch.rows = n`.
+
+        A batch that raises is recorded with one error before the exception propagates.
+        """
+        batch = Batch(rows, size)
+        started = time.time()
+        timer = time.perf_counter()
+        try:
+            yield batch
+        except BaseException:
+            batch.errors += 1
+            raise
+        finally:
+            self.record(stage, file, batch.rows, batch.bytes, time.perf_counter() - timer,
+                        batch.retries, batch.errors, started)
+
+    def report(self):
+        with self.lock:
+            return {
+                "run": self.run_name,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started or time.time())),
+                "elapsed_seconds": round(time.time() - (self.started or time.time()), 3),
+                "stages": {stage: stats.summary() for stage, stats in self.stages.items()},
+                "files": {
+                    stage: {file: stats.summary() for (s, file), stats in self.files.items() if s == stage}
+                    for stage in self.stages
+                },
+            }
+
+    def finish(self, reports_dir=REPORTS_DIR):
+        """Print the per-stage summary and write the run report. Returns the report path."""
+        report = self.report()
+        for stage, summary in report["stages"].items():
+            print(f"[INFO] {stage}: {summary['rows']} rows, {summary['bytes']} bytes in {summary['wall_seconds']}s "
+                  f"- {summary['rows_per_second']:.0f} rows/s, {summary['bytes_per_second']:.0f} B/s, "
+                  f"p95 batch {summary['batch_seconds']['p95']}s, {summary['retries']} retries, "
+                  f"{summary['errors']} errors")
+
+        os.makedirs(reports_dir, exist_ok=True)
+        name = f"{self.run_name or 'run'}-{time.strftime('%Y%m%dT%H%M%S', time.localtime(self.started))}.json"
+        path = os.path.join(reports_dir, name)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Run report written to {path}")
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+        return path
+
+    def prometheus_text(self):
+        """Stage totals in the Prometheus text format (per-file series would be unbounded)."""
+        report = self.report()
+        lines = []
+        counters = ("rows", "bytes", "batches", "retries", "errors")
+        for counter in counters:
+            lines.append(f"# TYPE pipeline_{counter}_total counter")
+            for stage, summary in report["stages"].items():
+                lines.append(f'pipeline_{counter}_total{{run="{report["run"]}",stage="{stage}"}} {summary[counter]}')
+        lines.append("# TYPE pipeline_batch_seconds summary")
+        for stage, summary in report["stages"].items():
+            for p in PERCENTILES:
+                value = summary["batch_seconds"][f"p{p}"]
+                lines.append(f'pipeline_batch_seconds{{run="{report["run"]}",stage="{stage}",quantile="{p / 100}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port):
+        """Expose live stage metrics on http://localhost:<port>/metrics from a daemon thread."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Keep scrapes out of the run output
+
+        self.server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[INFO] Live metrics on http://localhost:{port}/metrics")
+
+
+# Shared by every script of a run
+telemetry = Telemetry()
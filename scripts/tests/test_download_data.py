@@ -0,0 +1,147 @@
+"""Resume and revalidation of download_data.download_file against a local HTTP server.
+
+    python -m pytest scripts/tests
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from download_data import ByteBudget, Manifest, download_file
+
+CONTENT = bytes(range(256)) * 4096  # 1 MiB
+ETAG = '"v1"'
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """Serves CONTENT with a strong ETag, honouring If-None-Match and Range/If-Range unless told not to."""
+
+    honour_range = True
+    requests = []
+
+    def do_GET(self):
+        FileHandler.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+
+        body, status = CONTENT, 200
+        range_header = self.headers.get("Range")
+        if self.honour_range and range_header and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(CONTENT)}")
+                self.end_headers()
+                return
+            body, status = CONTENT[start:], 206
+
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {len(CONTENT) - len(body)}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadFileTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/data.csv"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FileHandler.honour_range = True
+        FileHandler.requests = []
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.directory.name, "data.csv")
+        self.part_path = self.output_path + ".part"
+        self.manifest = Manifest(os.path.join(self.directory.name, "manifest.json"))
+        self.budget = ByteBudget("test", 10 * len(CONTENT))
+
+    def tearDown(self):
+        self.manifest.flush()
+        self.directory.cleanup()
+
+    def download(self):
+        file_info = {"url": self.url, "output_path": self.output_path}
+        return download_file(file_info, (self.budget,), self.manifest)
+
+    def write_partial(self, size):
+        with open(self.part_path, "wb") as f:
+            f.write(CONTENT[:size])
+        self.manifest.update(self.url, path=self.output_path, etag=ETAG, last_modified=None, complete=False)
+
+    def assert_complete(self):
+        with open(self.output_path, "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertFalse(os.path.exists(self.part_path))
+        entry = self.manifest.get(self.url)
+        self.assertTrue(entry["complete"])
+        self.assertEqual(entry["etag"], ETAG)
+        self.assertEqual(entry["size"], len(CONTENT))
+        self.assertEqual(entry["sha256"], hashlib.sha256(CONTENT).hexdigest())
+
+    def test_full_download(self):
+        self.assertEqual(self.download(), len(CONTENT))
+        self.assert_complete()
+        self.assertNotIn("Range", FileHandler.requests[0])
+        self.assertEqual(self.budget.used, len(CONTENT))
+
+    def test_resume_partial_file(self):
+        self.write_partial(300000)
+        self.assertEqual(self.download(), len(CONTENT) - 300000)
+        self.assert_complete()
+        self.assertEqual(FileHandler.requests[0]["Range"], "bytes=300000-")
+        self.assertEqual(FileHandler.requests[0]["If-Range"], ETAG)
+        self.assertEqual(self.budget.used, len(CONTENT))
+
+    def test_unchanged_file_is_skipped(self):
+        self.download()
+        self.assertEqual(self.download(), 0)
+        self.assertEqual(FileHandler.requests[1]["If-None-Match"], ETAG)
+        self.assert_complete()
+        # The unchanged file still counts against the budget
+        self.assertEqual(self.budget.used, 2 * len(CONTENT))
+
+    def test_server_ignoring_range_restarts_the_file(self):
+        FileHandler.honour_range = False
+        self.write_partial(300000)
+        self.assertEqual(self.download(), len(CONTENT))
+        self.assertIn("Range", FileHandler.requests[0])
+        self.assert_complete()
+        self.assertEqual(self.budget.used, len(CONTENT))
+
+    def test_stale_partial_is_discarded_on_416(self):
+        self.write_partial(len(CONTENT))
+        with open(self.part_path, "ab") as f:
+            f.write(b"extra")
+        self.assertEqual(self.download(), len(CONTENT))
+        self.assert_complete()
+        self.assertEqual(len(FileHandler.requests), 2)
+
+    def test_manifest_is_written_on_flush(self):
+        self.download()
+        self.manifest.flush()
+        reloaded = Manifest(self.manifest.path)
+        self.assertTrue(reloaded.get(self.url)["complete"])
+
+
+if __name__ == "__main__":
+    unittest.main()
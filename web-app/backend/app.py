@@ -1,10 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from auth import router as auth_router
+from autocomplete import autocomplete
+from compression import CompressionMiddleware
+from db import postgres
+from es import es_client
+from metrics import MetricsMiddleware, metrics_endpoint
+from responses import FastJSONResponse
 from routers.protected import router as protected_router
+from routers.export import router as export_router
+from routers.dashboard import router as dashboard_router
+from routers.geo import router as geo_router
+from routers.timeseries import router as timeseries_router
+from routers.stations import router as stations_router
+from routers.suggest import router as suggest_router
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the Elasticsearch and PostgreSQL connection pools with the app and close them on shutdown.
+
+    The autocomplete values are loaded and refreshed by a background task meanwhile.
+    """
+    await es_client.start()
+    await postgres.start()
+    autocomplete.start()
+    yield
+    await autocomplete.stop()
+    await postgres.close()
+    await es_client.close()
+
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -15,9 +42,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip compression of the larger responses
+app.add_middleware(CompressionMiddleware)
+
+# Prometheus request metrics, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
 # Include routers
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])  # Public routes
 app.include_router(protected_router, prefix="/protected", tags=["Protected"])  # Protected routes
+app.include_router(export_router, prefix="/protected", tags=["Export"])  # Protected streaming exports
+app.include_router(dashboard_router, prefix="/protected", tags=["Dashboard"])  # Batched dashboard widgets
+app.include_router(geo_router, prefix="/protected", tags=["Geo"])  # Map tile aggregations
+app.include_router(timeseries_router, prefix="/protected", tags=["Time series"])  # Downsampled chart series
+app.include_router(stations_router, prefix="/protected", tags=["Stations"])  # GSOD/ISD statistics from Postgres
+app.include_router(suggest_router, prefix="/protected", tags=["Autocomplete"])  # In-memory prefix suggestions
 
 @app.get("/")
 def read_root():
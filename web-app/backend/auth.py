@@ -19,8 +19,8 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# Decode and validate JWT
-def decode_access_token(token: str = Depends(oauth2_scheme)):
+# Decode and validate JWT (async so protected routes do not need a threadpool hop)
+async def decode_access_token(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
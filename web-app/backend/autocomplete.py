@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import logging
+import os
+from bisect import bisect_left
+from fastapi.concurrency import run_in_threadpool
+from es import es_client
+from metrics import AUTOCOMPLETE_TERMS
+
+# Autocomplete configuration
+AUTOCOMPLETE_INDICES = [index for index in os.getenv("AUTOCOMPLETE_INDICES", "mongo_storm_events_data").split(",") if index]
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "600"))
+LOAD_RETRY_SECONDS = 30  # Until every index has loaded once, e.g. when Elasticsearch starts after the API
+AUTOCOMPLETE_FIELDS = ["STATE", "EVENT_TYPE", "CZ_NAME"]  # Keyword sub-fields hold the exact values
+TERMS_PAGE_SIZE = 1000
+PREFIX_END = "\U0010ffff"  # Sorts after every character, closing a prefix range
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """Case-insensitive prefix index over the distinct values of one field.
+
+    Each value is stored under its lowercased text and under every word
+    after the first, so "wind" finds "Thunderstorm Wind". A prefix is a
+    contiguous range of the sorted keys, found with two binary searches.
+    The most frequent values of the range come from a sparse table of range
+    maxima, so even a one-letter prefix costs O(size log size), not a scan.
+    """
+
+    def __init__(self, counts):
+        entries = []
+        for value in counts:
+            key = value.casefold()
+            entries.append((key, value))
+            entries.extend((key[i + 1:], value) for i, char in enumerate(key) if char == " ")
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.values = [value for _, value in entries]
+        self.counts = counts
+        # maxima[j][i]: position of the most frequent entry in [i, i + 2^j)
+        weights = [counts[value] for value in self.values]
+        self.weights = weights
+        self.maxima = [list(range(len(entries)))]
+        width = 1
+        while width * 2 <= len(entries):
+            previous = self.maxima[-1]
+            self.maxima.append([a if weights[a] >= weights[b] else b for a, b in zip(previous, previous[width:])])
+            width *= 2
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _argmax(self, start, end):
+        level = (end - start).bit_length() - 1
+        a, b = self.maxima[level][start], self.maxima[level][end - (1 << level)]
+        return a if self.weights[a] >= self.weights[b] else b
+
+    def suggest(self, prefix, size):
+        """The `size` most frequent values with a word starting with `prefix`, as (value, doc_count)."""
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + PREFIX_END, start)
+        suggestions, seen = [], set()
+        ranges = []
+        if start < end:
+            position = self._argmax(start, end)
+            ranges.append((-self.weights[position], position, start, end))
+        while ranges and len(suggestions) < size:
+            _, position, start, end = heapq.heappop(ranges)
+            value = self.values[position]
+            if value not in seen:  # A value can sit in the range under two of its words
+                seen.add(value)
+                suggestions.append((value, self.counts[value]))
+            for low, high in ((start, position), (position + 1, end)):
+                if low < high:
+                    best = self._argmax(low, high)
+                    heapq.heappush(ranges, (-self.weights[best], best, low, high))
+        return suggestions
+
+
+async def fetch_terms(index, field):
+    """Every distinct value of a field with its document count, paged with a composite terms aggregation."""
+    counts = {}
+    after = None
+    while True:
+        composite = {"size": TERMS_PAGE_SIZE, "sources": [{"value": {"terms": {"field": f"{field}.keyword"}}}]}
+        if after:
+            composite["after"] = after
+        response = await es_client.search(index=index, aggs={"values": {"composite": composite}}, size=0)
+        aggregation = response["aggregations"]["values"]
+        for bucket in aggregation["buckets"]:
+            counts[bucket["key"]["value"]] = bucket["doc_count"]
+        after = aggregation.get("after_key")
+        if not aggregation["buckets"] or after is None:
+            return counts
+
+
+class Autocomplete:
+    """In-memory prefix indices of the autocomplete fields, one set per index, refreshed in the background.
+
+    Suggestions never reach Elasticsearch: a refresh builds new indices from
+    aggregations and swaps them in whole, so readers always see a complete set.
+    """
+
+    def __init__(self, indices=AUTOCOMPLETE_INDICES, fields=AUTOCOMPLETE_FIELDS, interval=AUTOCOMPLETE_REFRESH_SECONDS):
+        self.indices = indices
+        self.fields = fields
+        self.interval = interval
+        self._prefixes = {}  # index -> {field: PrefixIndex}
+        self._task = None
+
+    async def refresh(self, index):
+        """Rebuild the prefix indices of one index from Elasticsearch."""
+        prefixes = {}
+        for field in self.fields:
+            counts = await fetch_terms(index, field)
+            # Sorting and the range maxima take tens of milliseconds on large fields; keep them off the loop
+            prefixes[field] = await run_in_threadpool(PrefixIndex, counts)
+            AUTOCOMPLETE_TERMS.labels(index, field).set(len(prefixes[field]))
+        self._prefixes[index] = prefixes
+
+    async def _run(self):
+        while True:
+            for index in self.indices:
+                try:
+                    await self.refresh(index)
+                except Exception as e:
+                    # Keep serving the previous values; the next round tries again
+                    logger.warning("Autocomplete refresh of %s failed: %s", index, e)
+            loaded = all(index in self._prefixes for index in self.indices)
+            await asyncio.sleep(self.interval if loaded else min(self.interval, LOAD_RETRY_SECONDS))
+
+    def start(self):
+        """Build the indices in the background now, then every `interval` seconds."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def suggest(self, index, field, prefix, size):
+        """Suggestions for a prefix, or None while the index has not been built yet."""
+        prefixes = self._prefixes.get(index)
+        if prefixes is None:
+            return None
+        return prefixes[field].suggest(prefix, size)
+
+
+# Shared autocomplete indices, refreshed with the application
+autocomplete = Autocomplete()
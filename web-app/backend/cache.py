@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import OrderedDict
+from metrics import CACHE_REQUESTS
+
+# Cache configuration
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 512
+# Map tiles: many small entries, requested again on every pan and zoom
+TILE_CACHE_TTL_SECONDS = 3600
+TILE_CACHE_MAX_ENTRIES = 8192
+
+
+class TTLCache:
+    """Size-bounded LRU cache with per-entry TTL and coalescing of identical in-flight computations.
+
+    Keys are tuples whose first element is the Elasticsearch index, so every
+    entry of an index can be dropped at once when it is re-indexed. The cache
+    lives on the application's event loop and is not thread-safe.
+    """
+
+    def __init__(self, name, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future shared by concurrent callers
+        self._generations = {}  # index -> invalidation counter
+        self._epoch = 0  # bumped when every index is invalidated
+
+    async def get_or_compute(self, key, compute, store=True):
+        """Return the cached value for `key`, awaiting `compute()` once for all concurrent callers.
+
+        With `store=False` the result is only shared with the callers already
+        waiting for it and is not cached.
+        """
+        if store:
+            value = self.peek(key)
+            if value is not None:
+                return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            CACHE_REQUESTS.labels(self.name, "coalesced").inc()
+            # shield: a cancelled follower must not cancel the shared computation
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation(key[0])
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            del self._inflight[key]
+            future.cancel()
+            raise
+        except Exception as e:
+            del self._inflight[key]
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when no follower is waiting
+            raise
+
+        del self._inflight[key]
+        # Results computed before an invalidation must not repopulate the cache
+        if store and self._generation(key[0]) == generation:
+            self.put(key, value)
+        future.set_result(value)
+        return value
+
+    def peek(self, key):
+        """Return the fresh cached value for `key`, or None."""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            CACHE_REQUESTS.labels(self.name, "hit").inc()
+            return entry[1]
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    def put(self, key, value):
+        """Store a value computed outside `get_or_compute`, e.g. by a batched query."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _generation(self, index):
+        return self._epoch, self._generations.get(index, 0)
+
+    def invalidate(self, index=None):
+        """Drop the entries of one index, or of every index when `index` is None."""
+        if index is None:
+            self._entries.clear()
+            self._epoch += 1
+            return
+        self._generations[index] = self._generations.get(index, 0) + 1
+        for key in [key for key in self._entries if key[0] == index]:
+            del self._entries[key]
+
+
+# Shared cache for aggregation results
+aggregation_cache = TTLCache("aggregations")
+# Shared cache for geo tile aggregations
+tile_cache = TTLCache("geo_tiles", maxsize=TILE_CACHE_MAX_ENTRIES, ttl=TILE_CACHE_TTL_SECONDS)
@@ -0,0 +1,134 @@
+import os
+import zlib
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Compression configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes; smaller bodies are sent as is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # Low qualities are the fast ones, meant for dynamic content
+THREAD_MIN_SIZE = 256 * 1024  # Chunks from this size are compressed off the event loop
+# Media types that are already compressed
+SKIPPED_MEDIA_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(self, data, final):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def encode(self, data, final):
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+# Preferred first; brotli is only offered when the module is installed
+ENCODERS = ([BrotliEncoder] if brotli is not None else []) + [GzipEncoder]
+
+
+def negotiate(accept_encoding):
+    """Pick the encoder for an `Accept-Encoding` header, or None for identity (codings with q=0 are refused)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    for encoder in ENCODERS:
+        if accepted.get(encoder.name, accepted.get("*", 0.0)) > 0:
+            return encoder
+    return None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip, as negotiated with the client.
+
+    Complete bodies under `minimum_size` are sent uncompressed. Streaming
+    responses (exports) are compressed chunk by chunk and flushed, so every
+    chunk still reaches the client as soon as it is produced.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoder_class = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoder_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                media_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or start["status"] in (204, 206, 304)
+                    or media_type.startswith(SKIPPED_MEDIA_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = encoder_class()
+                headers["Content-Encoding"] = encoder.name
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+
+            if len(body) >= THREAD_MIN_SIZE:
+                data = await run_in_threadpool(encoder.encode, body, not more_body)
+            else:
+                data = encoder.encode(body, not more_body)
+            if start is not None:
+                if not more_body:
+                    MutableHeaders(raw=start["headers"])["Content-Length"] = str(len(data))
+                await send(start)
+                start = None
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,57 @@
+import os
+import time
+import asyncpg
+from metrics import DB_LATENCY
+
+# PostgreSQL configuration (GSOD/ISD tables loaded by scripts/ingest_postgres.py)
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
+POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
+POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+POSTGRES_DB = os.getenv("POSTGRES_DB", "noaa")
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "10"))
+POSTGRES_QUERY_TIMEOUT = float(os.getenv("POSTGRES_QUERY_TIMEOUT", "10"))  # Seconds
+
+
+class PostgresPool:
+    """asyncpg connection pool used by the routers, opened and closed with the application.
+
+    The pool starts empty and opens connections on demand, so the API still
+    starts (and serves Elasticsearch routes) while Postgres is unavailable.
+    """
+
+    def __init__(self, size=POSTGRES_POOL_SIZE, timeout=POSTGRES_QUERY_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._pool = None
+
+    async def start(self):
+        self._pool = await asyncpg.create_pool(
+            host=POSTGRES_HOST,
+            port=POSTGRES_PORT,
+            user=POSTGRES_USER,
+            password=POSTGRES_PASSWORD,
+            database=POSTGRES_DB,
+            min_size=0,
+            max_size=self.size,
+            command_timeout=self.timeout,
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def fetch(self, name, query, *args):
+        """Run a query and return its rows; `name` labels its latency metric."""
+        if self._pool is None:
+            await self.start()
+        started = time.perf_counter()
+        try:
+            return await self._pool.fetch(query, *args)
+        finally:
+            DB_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+
+# Shared pool, started and stopped with the application
+postgres = PostgresPool()
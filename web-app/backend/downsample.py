@@ -0,0 +1,41 @@
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of a series of (x, y) points.
+
+    Returns the indices of at most `threshold` points that keep the visual
+    shape of the series (peaks and dips survive, flat stretches thin out).
+    The first and last points are always kept; x must be increasing.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    # The inner points are split into threshold - 2 buckets; one point is kept per bucket
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket, the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(points[j][0] for j in range(next_start, next_end)) / count
+        avg_y = sum(points[j][1] for j in range(next_start, next_end)) / count
+
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def downsample(rows, x, y, max_points):
+    """Keep at most `max_points` of a list of dicts, chosen by LTTB on the `x`/`y` keys."""
+    if not max_points or len(rows) <= max_points:
+        return rows
+    return [rows[i] for i in lttb([(row[x], row[y]) for row in rows], max_points)]
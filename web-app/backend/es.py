@@ -0,0 +1,67 @@
+import os
+import time
+from elasticsearch import Elasticsearch, AsyncElasticsearch
+from fastapi.concurrency import run_in_threadpool
+from metrics import record_es_call
+
+# Elasticsearch client configuration
+ES_URL = os.getenv("ELASTICSEARCH_URL", "http://elasticsearch:9200")
+ES_CLIENT_MODE = os.getenv("ES_CLIENT_MODE", "async")  # "async" or "sync"
+ES_MAXSIZE = int(os.getenv("ES_MAXSIZE", "25"))  # Connection pool size
+ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "10"))  # Seconds
+# Run the shard pre-filter (can_match) phase from this many shards, so searches
+# through the storm events alias skip the year indices that cannot match
+ES_PRE_FILTER_SHARD_SIZE = int(os.getenv("ES_PRE_FILTER_SHARD_SIZE", "1"))
+
+
+class ESClient:
+    """Elasticsearch client used by the routers, backed by either client flavour.
+
+    In "async" mode calls go through AsyncElasticsearch on the event loop; in
+    "sync" mode the blocking client runs on FastAPI's threadpool, which is how
+    the handlers behaved before they became coroutines.
+    """
+
+    def __init__(self, mode=ES_CLIENT_MODE, url=ES_URL, maxsize=ES_MAXSIZE, timeout=ES_REQUEST_TIMEOUT):
+        self.mode = mode
+        self.url = url
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._client = None
+
+    async def start(self):
+        client_class = AsyncElasticsearch if self.mode == "async" else Elasticsearch
+        self._client = client_class(hosts=[self.url], maxsize=self.maxsize, timeout=self.timeout)
+
+    async def close(self):
+        if self._client is None:
+            return
+        if self.mode == "async":
+            await self._client.close()
+        else:
+            self._client.close()
+        self._client = None
+
+    async def request(self, method, **kwargs):
+        """Call an Elasticsearch API method by name, e.g. `request("search", index=...)` or `request("indices.get_mapping", ...)`."""
+        if self._client is None:
+            await self.start()
+        kwargs.setdefault("request_timeout", self.timeout)
+        api = self._client
+        for name in method.split("."):
+            api = getattr(api, name)
+        started = time.perf_counter()
+        if self.mode == "async":
+            response = await api(**kwargs)
+        else:
+            response = await run_in_threadpool(api, **kwargs)
+        record_es_call(method, time.perf_counter() - started, response)
+        return response
+
+    async def search(self, **kwargs):
+        kwargs.setdefault("pre_filter_shard_size", ES_PRE_FILTER_SHARD_SIZE)
+        return await self.request("search", **kwargs)
+
+
+# Shared client, started and stopped with the application
+es_client = ESClient()
@@ -0,0 +1,93 @@
+import time
+from contextvars import ContextVar
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from fastapi import Response
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling a request, streaming included", ["method", "route"]
+)
+REQUEST_ES_TIME = Histogram(
+    "http_request_es_took_seconds", "Elasticsearch `took` summed over the queries of a request", ["method", "route"]
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled", ["method"])
+REQUEST_ERRORS = Counter("http_request_errors_total", "Responses with a 4xx/5xx status, or failed requests", ["method", "route", "status"])
+ES_LATENCY = Histogram("es_request_duration_seconds", "Round trip of an Elasticsearch API call", ["operation"])
+ES_TOOK = Histogram("es_took_seconds", "Time Elasticsearch reports having spent on a call (`took`)", ["operation"])
+DB_LATENCY = Histogram("db_query_duration_seconds", "Round trip of a PostgreSQL query", ["query"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by outcome (hit, miss, coalesced)", ["cache", "result"])
+AUTOCOMPLETE_TERMS = Gauge("autocomplete_terms", "Distinct values held by an autocomplete prefix index", ["index", "field"])
+
+# ES time spent by the request being handled; a list so tasks spawned by the handler add to the same total
+_request_es_took = ContextVar("request_es_took", default=None)
+
+UNMATCHED_ROUTE = "unmatched"  # Keeps unknown paths from creating one series each
+
+
+def record_es_call(operation, elapsed, response):
+    """Record an Elasticsearch call, and its `took` against the current request."""
+    ES_LATENCY.labels(operation).observe(elapsed)
+    took = response.get("took") if isinstance(response, dict) else None
+    if took is None:
+        return
+    ES_TOOK.labels(operation).observe(took / 1000)
+    request_took = _request_es_took.get()
+    if request_took is not None:
+        request_took.append(took / 1000)
+
+
+def route_template(scope):
+    """Path template of the matched route, e.g. `/protected/elasticsearch/{index}`."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = route.path
+    if not route.path_regex.match(scope["path"]):
+        # Some FastAPI versions keep the routes of included routers without their prefix
+        template = scope["path"].rsplit("/", template.count("/"))[0] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request until its last byte is sent.
+
+    Requests are labelled with their route template (`/protected/elasticsearch/{index}`)
+    rather than the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        es_took = []
+        token = _request_es_took.set(es_took)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            _request_es_took.reset(token)
+            route = route_template(scope)
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            if es_took:
+                REQUEST_ES_TIME.labels(method, route).observe(sum(es_took))
+            if status >= 400:
+                REQUEST_ERRORS.labels(method, route, str(status)).inc()
+
+
+def metrics_endpoint():
+    """Prometheus text exposition of the backend metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,20 @@
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, several times faster than `json.dumps` on search hits.
+
+    It is the application's default response class. Routes returning many
+    documents build it themselves, which also skips FastAPI's
+    `jsonable_encoder` pass over every value.
+    """
+
+    def render(self, content):
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
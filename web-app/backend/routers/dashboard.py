@@ -0,0 +1,121 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from auth import decode_access_token
+from cache import aggregation_cache
+from es import es_client
+from responses import FastJSONResponse
+from routers.protected import CURSOR_SORT, build_filter_query, encode_cursor, source_filter
+from typing import Literal, Optional, List
+
+# Terms aggregations a widget can ask for: field -> (aggregation name, ES field)
+AGGREGATIONS = {
+    "event_type": ("event_types", "EVENT_TYPE.keyword"),
+    "state": ("states", "STATE.keyword"),
+}
+
+# Create a router for dashboard routes
+router = APIRouter()
+
+
+class WidgetSpec(BaseModel):
+    """One dashboard widget, mirroring the parameters of the matching single-widget route."""
+    id: str
+    type: Literal["aggregate", "events", "filter_state"]
+    field: Optional[Literal["event_type", "state"]] = None  # aggregate
+    size: int = 10
+    page: int = 1  # events
+    state: Optional[str] = None  # events
+    event_type: Optional[str] = None  # events
+    year: Optional[int] = None  # events
+    pagination: Literal["offset", "cursor"] = "offset"  # events; cursor returns a next_cursor for the events route
+    states: Optional[List[str]] = None  # filter_state
+    fields: Optional[List[str]] = None  # events, filter_state
+
+
+class DashboardRequest(BaseModel):
+    index: str
+    widgets: List[WidgetSpec]
+
+
+def build_widget_search(widget):
+    """Return the search body of a widget, as its single-widget route would send it."""
+    if widget.type == "aggregate":
+        name, field = AGGREGATIONS[widget.field]
+        return {"size": 0, "aggs": {name: {"terms": {"field": field, "size": widget.size}}}}
+    if widget.type == "filter_state":
+        return {
+            "query": {"terms": {"STATE.keyword": widget.states or []}},
+            "_source": source_filter(widget.fields),
+            "size": widget.size,
+        }
+    search = {
+        "query": build_filter_query(widget.state, widget.event_type, widget.year),
+        "_source": source_filter(widget.fields),
+        "size": widget.size,
+    }
+    if widget.pagination == "cursor":
+        # First page of the cursor route; its point-in-time is opened when the next page is read
+        search.update(sort=CURSOR_SORT, track_total_hits=False)
+    else:
+        search["from"] = (widget.page - 1) * widget.size
+    return search
+
+
+def read_widget_response(widget, response):
+    if "error" in response:
+        return {"error": response["error"]}
+    if widget.type == "aggregate":
+        name, _ = AGGREGATIONS[widget.field]
+        return {"aggregations": response["aggregations"][name]["buckets"]}
+    hits = response["hits"]["hits"]
+    results = {"results": [hit["_source"] for hit in hits]}
+    if widget.type == "events" and widget.pagination == "cursor":
+        results["next_cursor"] = encode_cursor(None, hits[-1]["sort"]) if len(hits) == widget.size else None
+    return results
+
+
+@router.post("/dashboard")
+async def load_dashboard(request: DashboardRequest, username: str = Depends(decode_access_token)):
+    """Answer every widget of the dashboard with a single `_msearch` round trip.
+
+    Aggregation widgets share the cache of the aggregate routes: cached ones
+    are answered without reaching Elasticsearch, the others are stored back.
+    Concurrent requests for the same widgets share one `_msearch`.
+    """
+    for widget in request.widgets:
+        if widget.type == "aggregate" and widget.field is None:
+            raise HTTPException(status_code=422, detail=f"Widget {widget.id}: aggregate widgets need a field")
+
+    results = {}
+    pending = []
+    for widget in request.widgets:
+        if widget.type == "aggregate":
+            buckets = aggregation_cache.peek((request.index, widget.field, widget.size))
+            if buckets is not None:
+                results[widget.id] = {"aggregations": buckets}
+                continue
+        pending.append(widget)
+
+    async def search_pending():
+        body = []
+        for widget in pending:
+            body.append({"index": request.index})
+            body.append(build_widget_search(widget))
+        response = await es_client.request("msearch", body=body)
+
+        batch = {}
+        for widget, widget_response in zip(pending, response["responses"]):
+            batch[widget.id] = read_widget_response(widget, widget_response)
+            if widget.type == "aggregate" and "aggregations" in batch[widget.id]:
+                aggregation_cache.put((request.index, widget.field, widget.size), batch[widget.id]["aggregations"])
+        return batch
+
+    if pending:
+        # Event rows and widget errors are not cached; only the in-flight search is shared
+        key = (request.index, "dashboard", tuple(widget.model_dump_json() for widget in pending))
+        try:
+            results.update(await aggregation_cache.get_or_compute(key, search_pending, store=False))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {e}")
+
+    return FastJSONResponse({"widgets": results})
@@ -0,0 +1,173 @@
+import asyncio
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from auth import decode_access_token
+from es import es_client
+from routers.protected import build_filter_query
+from typing import Literal, Optional, List
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow export is optional
+    pa = None
+
+# Export configuration
+EXPORT_SLICES = 4
+EXPORT_PAGE_SIZE = 1000
+EXPORT_SCROLL = "2m"
+EXPORT_QUEUE_PAGES = 8  # Pages buffered between the ES readers and the client
+# Mapping types that are not one value per cell; geo points are also exported as their *_LAT/*_LON columns
+NON_SCALAR_TYPES = {"geo_point", "geo_shape", "object", "nested"}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Create a router for export routes
+router = APIRouter()
+
+
+async def read_slice(index, query, fields, slice_id, max_slices, queue):
+    """Scroll through one slice of the result set, pushing pages of `_source` onto the queue."""
+    scroll_id = None
+    try:
+        body = {"query": query, "sort": ["_doc"], "size": EXPORT_PAGE_SIZE}
+        if max_slices > 1:
+            body["slice"] = {"id": slice_id, "max": max_slices}
+        if fields:
+            body["_source"] = {"includes": fields}
+        response = await es_client.search(index=index, scroll=EXPORT_SCROLL, **body)
+        while True:
+            scroll_id = response.get("_scroll_id", scroll_id)
+            hits = response["hits"]["hits"]
+            if not hits:
+                break
+            await queue.put([hit["_source"] for hit in hits])
+            response = await es_client.request("scroll", scroll_id=scroll_id, scroll=EXPORT_SCROLL)
+    finally:
+        if scroll_id:
+            await es_client.request("clear_scroll", scroll_id=scroll_id, ignore=404)
+
+
+async def iter_pages(index, query, fields, slices):
+    """Yield pages from all slices as soon as any of them produces one."""
+    queue = asyncio.Queue(maxsize=EXPORT_QUEUE_PAGES)
+    done = object()
+
+    async def run_slice(slice_id):
+        try:
+            await read_slice(index, query, fields, slice_id, slices, queue)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(done)
+
+    tasks = [asyncio.create_task(run_slice(slice_id)) for slice_id in range(slices)]
+    try:
+        remaining = slices
+        while remaining:
+            page = await queue.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        # The client may disconnect mid-stream: stop the readers and free their scrolls
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def mapped_fields(index):
+    """Top-level scalar fields of an index, or of every index behind an alias, in mapping order."""
+    response = await es_client.request("indices.get_mapping", index=index)
+    columns = {}
+    for mapping in response.values():
+        for column, properties in mapping.get("mappings", {}).get("properties", {}).items():
+            # Object fields have "properties" and no "type"
+            if properties.get("type", "object") not in NON_SCALAR_TYPES:
+                columns.setdefault(column)
+    return list(columns)
+
+
+async def stream_ndjson(pages):
+    async for page in pages:
+        yield "".join(json.dumps(doc, default=str) + "\n" for doc in page).encode()
+
+
+async def stream_csv(pages, columns):
+    header_written = False
+    async for page in pages:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        if not header_written:
+            writer.writeheader()
+            header_written = True
+        writer.writerows(page)
+        yield buffer.getvalue().encode()
+
+
+async def stream_arrow(pages, columns):
+    """Stream record batches in Arrow IPC stream format. Values are exported as strings, like the CSV export."""
+    sink = io.BytesIO()
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    writer = None
+    async for page in pages:
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, schema)
+        rows = [{column: None if doc.get(column) is None else str(doc[column]) for column in columns} for doc in page]
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is None:
+        # Empty result: still emit a valid stream carrying the schema
+        writer = pa.ipc.new_stream(sink, schema)
+    writer.close()
+    yield sink.getvalue()
+
+
+@router.get("/elasticsearch/{index}/export")
+async def export_events(
+    index: str,
+    format: Literal["ndjson", "csv", "arrow"] = "ndjson",
+    state: Optional[str] = None,
+    event_type: Optional[str] = None,
+    year: Optional[int] = None,
+    fields: Optional[List[str]] = Query(None),
+    slices: int = Query(EXPORT_SLICES, ge=1, le=16),
+    username: str = Depends(decode_access_token)
+):
+    """Stream every event matching the filters as NDJSON, CSV or Arrow IPC.
+
+    Results are read with a sliced scroll in parallel and flushed page by
+    page, so memory stays constant and the first bytes arrive before the
+    whole result set has been read. CSV and Arrow columns are the requested
+    `fields`, or every field of the index mapping.
+    """
+    if format == "arrow" and pa is None:
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow")
+    columns = fields
+    if format != "ndjson" and not columns:
+        try:
+            columns = await mapped_fields(index)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Elasticsearch mapping lookup failed: {e}")
+
+    pages = iter_pages(index, build_filter_query(state, event_type, year), fields, slices)
+    if format == "ndjson":
+        body = stream_ndjson(pages)
+    elif format == "csv":
+        body = stream_csv(pages, columns)
+    else:
+        body = stream_arrow(pages, columns)
+
+    headers = {"Content-Disposition": f'attachment; filename="{index}.{format}"'}
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,92 @@
+import math
+from fastapi import APIRouter, HTTPException, Depends, Path, Query
+from auth import decode_access_token
+from cache import tile_cache
+from es import es_client
+from routers.protected import build_filter_query
+from typing import Literal, Optional
+
+# geo_point fields written by the indexer from BEGIN_LAT/LON and END_LAT/LON
+GEO_FIELDS = {"begin": "BEGIN_POINT", "end": "END_POINT"}
+MAX_ZOOM = 29  # Deepest geotile_grid precision
+DEFAULT_CELL_ZOOM = 5  # Extra zoom levels inside a tile: 2^5 x 2^5 cells per tile
+MAX_CELL_ZOOM = 7  # 4^7 = 16384 buckets per tile, well under the search.max_buckets default of 65536
+
+# Create a router for geo routes
+router = APIRouter()
+
+
+def tile_bounds(z, x, y):
+    """Bounding box of a Web Mercator (XYZ) tile as ES `top_left`/`bottom_right` points."""
+    n = 2 ** z
+    lat = lambda row: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return {
+        "top_left": {"lat": lat(y), "lon": x / n * 360 - 180},
+        "bottom_right": {"lat": lat(y + 1), "lon": (x + 1) / n * 360 - 180},
+    }
+
+
+def cell_center(key):
+    """Center of a geotile_grid cell, from its `z/x/y` key."""
+    z, x, y = (int(part) for part in key.split("/"))
+    n = 2 ** z
+    return {
+        "lat": math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 0.5) / n)))),
+        "lon": (x + 0.5) / n * 360 - 180,
+    }
+
+
+@router.get("/elasticsearch/{index}/geo/tiles/{z}/{x}/{y}")
+async def geo_tile(
+    index: str,
+    z: int = Path(..., ge=0, le=MAX_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    point: Literal["begin", "end"] = "begin",
+    cell_zoom: int = Query(DEFAULT_CELL_ZOOM, ge=0, le=MAX_CELL_ZOOM),
+    state: Optional[str] = None,
+    event_type: Optional[str] = None,
+    year: Optional[int] = None,
+    username: str = Depends(decode_access_token)
+):
+    """Count events per geotile cell inside one map tile, filtered like the events route.
+
+    The tile `z/x/y` is the bounding box and zoom level of a slippy map tile;
+    it is split into 2^cell_zoom x 2^cell_zoom cells. Tiles are cached, so
+    panning a heatmap costs one small aggregation per new tile.
+    """
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail=f"Tile {x}/{y} does not exist at zoom {z}")
+    precision = min(z + cell_zoom, MAX_ZOOM)
+    field = GEO_FIELDS[point]
+
+    async def compute():
+        bounds = tile_bounds(z, x, y)
+        query = build_filter_query(state, event_type, year)
+        query["bool"].setdefault("filter", []).append({"geo_bounding_box": {field: bounds}})
+        response = await es_client.search(
+            index=index,
+            query=query,
+            aggs={
+                "tiles": {
+                    "geotile_grid": {
+                        "field": field,
+                        "precision": precision,
+                        "bounds": bounds,
+                        "size": 4 ** (precision - z),
+                    }
+                }
+            },
+            size=0
+        )
+        return [
+            {"key": bucket["key"], "doc_count": bucket["doc_count"], **cell_center(bucket["key"])}
+            for bucket in response["aggregations"]["tiles"]["buckets"]
+        ]
+
+    try:
+        key = (index, z, x, y, precision, field, state, event_type, year)
+        cells = await tile_cache.get_or_compute(key, compute)
+        return {"tile": {"z": z, "x": x, "y": y}, "precision": precision, "cells": cells}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Elasticsearch aggregation failed: {e}")
@@ -1,66 +1,162 @@
+import base64
+import json
+from elasticsearch import RequestError
 from fastapi import APIRouter, HTTPException, Depends, Query
-from elasticsearch import Elasticsearch
 from auth import decode_access_token
-from typing import Optional, List
+from autocomplete import autocomplete
+from cache import aggregation_cache, tile_cache
+from es import es_client
+from responses import FastJSONResponse
+from typing import Literal, Optional, List
 
-# Initialize Elasticsearch client
-es_client = Elasticsearch(hosts=[{"host": "elasticsearch", "port": 9200, "scheme": "http"}])
+# Cursor pagination: stable sort key and point-in-time lifetime between pages
+CURSOR_SORT = [{"BEGIN_DATE_TIME": "asc"}, {"EVENT_ID": "asc"}]
+# Point-in-time document order, for indices built before BEGIN_DATE_TIME/EVENT_ID were mapped as date/long
+LEGACY_CURSOR_SORT = [{"_shard_doc": "asc"}]
+PIT_KEEP_ALIVE = "2m"
 
 # Create a router for protected routes
 router = APIRouter()
 
+def build_filter_query(state=None, event_type=None, year=None):
+    """Build the bool query shared by the event routes for the state/event type/year filters."""
+    query = {"bool": {"must": []}}
+    if state:
+        query["bool"]["must"].append({"term": {"STATE.keyword": state}})
+    if event_type:
+        query["bool"]["must"].append({"term": {"EVENT_TYPE.keyword": event_type}})
+    if year:
+        query["bool"]["must"].append({"term": {"YEAR": year}})
+        # Lets the can_match phase skip every per-year index whose dates fall outside the year
+        query["bool"]["filter"] = [
+            {"range": {"BEGIN_DATE_TIME": {"gte": str(year), "lt": str(year + 1), "format": "yyyy"}}}
+        ]
+    return query
+
+def source_filter(fields):
+    """`_source` of a search: only the requested fields, or whole documents when none are given."""
+    return {"includes": fields} if fields else True
+
+def hits_response(hits, **extra):
+    """Response listing the `_source` of search hits, rendered by orjson without FastAPI's encoder pass."""
+    return FastJSONResponse({"results": [hit["_source"] for hit in hits], **extra})
+
+def encode_cursor(pit_id, search_after, legacy=False):
+    """Pack a point-in-time id, the last sort values and the sort used into an opaque URL-safe token."""
+    payload = json.dumps({"pit": pit_id, "after": search_after, "legacy": legacy}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return payload["pit"], payload["after"], payload.get("legacy", False)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def search_with_cursor(index, query, size, cursor, fields=None):
+    """Fetch one page with a point-in-time + search_after, so every page costs the same.
+
+    Indices whose BEGIN_DATE_TIME or EVENT_ID cannot be sorted on (text fields
+    from the old loader) are paged in document order instead, until re-indexed.
+    A cursor without a point-in-time (from the dashboard's first page) opens one.
+    """
+    pit_id, search_after, legacy = decode_cursor(cursor) if cursor else (None, None, False)
+    if pit_id is None:
+        pit = await es_client.request("open_point_in_time", index=index, keep_alive=PIT_KEEP_ALIVE)
+        pit_id = pit["id"]
+
+    body = {
+        "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+        "query": query,
+        "_source": source_filter(fields),
+        "sort": LEGACY_CURSOR_SORT if legacy else CURSOR_SORT,
+        "size": size,
+        "track_total_hits": False,
+    }
+    if search_after:
+        body["search_after"] = search_after
+    try:
+        response = await es_client.search(**body)
+    except RequestError:
+        if cursor or legacy:
+            raise
+        legacy = True
+        body["sort"] = LEGACY_CURSOR_SORT
+        response = await es_client.search(**body)
+
+    hits = response["hits"]["hits"]
+    # ES may hand back a refreshed PIT id; always continue with the latest one
+    pit_id = response.get("pit_id", pit_id)
+    if len(hits) < size:
+        await es_client.request("close_point_in_time", body={"id": pit_id}, ignore=404)
+        next_cursor = None
+    else:
+        next_cursor = encode_cursor(pit_id, hits[-1]["sort"], legacy)
+    return hits_response(hits, next_cursor=next_cursor)
+
 @router.get("/elasticsearch/{index}")
-def get_events(
+async def get_events(
     index: str,
     page: int = 1,
     size: int = 10,
     state: Optional[str] = None,
     event_type: Optional[str] = None,
     year: Optional[int] = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Query(None),
     username: str = Depends(decode_access_token)
 ):
-    """Retrieve paginated events with optional filters: state, event type, or year."""
+    """Retrieve paginated events with optional filters: state, event type, or year.
+
+    With `pagination=cursor` (or a `cursor` from a previous page) results are
+    read through a point-in-time and the response carries an opaque
+    `next_cursor`, which is null on the last page. `fields` (repeatable)
+    limits the documents to those fields, e.g. the columns of a table.
+    """
     try:
-        query = {"bool": {"must": []}}
-        if state:
-            query["bool"]["must"].append({"term": {"STATE.keyword": state}})
-        if event_type:
-            query["bool"]["must"].append({"term": {"EVENT_TYPE.keyword": event_type}})
-        if year:
-            query["bool"]["must"].append({"term": {"YEAR": year}})
-        
+        query = build_filter_query(state, event_type, year)
+        if cursor or pagination == "cursor":
+            return await search_with_cursor(index, query, size, cursor, fields)
+
         start = (page - 1) * size
-        response = es_client.search(index=index, query=query, from_=start, size=size)
-        return {"results": [hit["_source"] for hit in response["hits"]["hits"]]}
+        response = await es_client.search(
+            index=index, query=query, _source=source_filter(fields), from_=start, size=size
+        )
+        return hits_response(response["hits"]["hits"])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {e}")
 
 
 @router.get("/elasticsearch/{index}/search")
-def search_events(
+async def search_events(
     index: str,
     field: str,
     keyword: str,
     size: int = 10,
+    fields: Optional[List[str]] = Query(None),
     username: str = Depends(decode_access_token)
 ):
-    """Search events by keyword in a specified field."""
+    """Search events by keyword in a specified field, optionally returning only `fields`."""
     try:
-        response = es_client.search(
+        response = await es_client.search(
             index=index,
             query={"match": {field: keyword}},
+            _source=source_filter(fields),
             size=size
         )
-        return {"results": [hit["_source"] for hit in response["hits"]["hits"]]}
+        return hits_response(response["hits"]["hits"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {e}")
 
 
 @router.get("/elasticsearch/{index}/aggregate/event_type")
-def aggregate_by_event_type(index: str, size: int = 10, username: str = Depends(decode_access_token)):
+async def aggregate_by_event_type(index: str, size: int = 10, username: str = Depends(decode_access_token)):
     """Aggregate events by event type and return counts."""
-    try:
-        response = es_client.search(
+    async def compute():
+        response = await es_client.search(
             index=index,
             aggs={
                 "event_types": {
@@ -69,16 +165,20 @@ def aggregate_by_event_type(index: str, size: int = 10, username: str = Depends(
             },
             size=0
         )
-        return {"aggregations": response["aggregations"]["event_types"]["buckets"]}
+        return response["aggregations"]["event_types"]["buckets"]
+
+    try:
+        buckets = await aggregation_cache.get_or_compute((index, "event_type", size), compute)
+        return {"aggregations": buckets}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Elasticsearch aggregation failed: {e}")
 
 
 @router.get("/elasticsearch/{index}/aggregate/state")
-def aggregate_by_state(index: str, size: int = 10, username: str = Depends(decode_access_token)):
+async def aggregate_by_state(index: str, size: int = 10, username: str = Depends(decode_access_token)):
     """Aggregate events by state and return counts."""
-    try:
-        response = es_client.search(
+    async def compute():
+        response = await es_client.search(
             index=index,
             aggs={
                 "states": {
@@ -87,25 +187,47 @@ def aggregate_by_state(index: str, size: int = 10, username: str = Depends(decod
             },
             size=0
         )
-        return {"aggregations": response["aggregations"]["states"]["buckets"]}
+        return response["aggregations"]["states"]["buckets"]
+
+    try:
+        buckets = await aggregation_cache.get_or_compute((index, "state", size), compute)
+        return {"aggregations": buckets}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Elasticsearch aggregation failed: {e}")
 
 
+@router.post("/elasticsearch/{index}/cache/invalidate")
+async def invalidate_cache(index: str, username: str = Depends(decode_access_token)):
+    """Drop cached aggregations and geo tiles of an index, e.g. after it has been re-indexed.
+
+    Its autocomplete values are reloaded too, without waiting for the periodic refresh.
+    """
+    aggregation_cache.invalidate(index)
+    tile_cache.invalidate(index)
+    if index in autocomplete.indices:
+        try:
+            await autocomplete.refresh(index)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Autocomplete refresh failed: {e}")
+    return {"invalidated": index}
+
+
 @router.get("/elasticsearch/{index}/filter/state")
-def filter_by_state(
+async def filter_by_state(
     index: str,
     states: List[str] = Query(...),
     size: int = 10,
+    fields: Optional[List[str]] = Query(None),
     username: str = Depends(decode_access_token)
 ):
-    """Retrieve events filtered by one or multiple states."""
+    """Retrieve events filtered by one or multiple states, optionally returning only `fields`."""
     try:
-        response = es_client.search(
+        response = await es_client.search(
             index=index,
             query={"terms": {"STATE.keyword": states}},
+            _source=source_filter(fields),
             size=size
         )
-        return {"results": [hit["_source"] for hit in response["hits"]["hits"]]}
+        return hits_response(response["hits"]["hits"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {e}")
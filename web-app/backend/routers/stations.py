@@ -0,0 +1,116 @@
+from datetime import date, datetime, time, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query
+from auth import decode_access_token
+from cache import aggregation_cache
+from db import postgres
+from routers.timeseries import GSOD_METRICS
+from typing import Literal, Optional, List
+
+# Partitioned tables created by scripts/postgres_schema.py
+TABLES = {"gsod": "gsod_data", "isd": "isd_data"}
+DEFAULT_STATS_METRICS = ["TEMP", "MAX", "MIN", "PRCP"]
+
+# Create a router for PostgreSQL station statistics
+router = APIRouter()
+
+
+def date_bounds(dataset, start, end):
+    """Half-open [start, end + 1 day) bounds, typed like the table's DATE column (ISD stores timestamps)."""
+    upper = end + timedelta(days=1) if end else None
+    if dataset == "isd":
+        return (
+            datetime.combine(start, time.min) if start else None,
+            datetime.combine(upper, time.min) if upper else None,
+        )
+    return start, upper
+
+
+def summary_query(dataset, metrics, station=None, start=None, end=None):
+    """Build the statistics query of a dataset and its arguments.
+
+    DATE is only compared to parameters, so the planner (or the executor,
+    for generic plans) prunes the yearly partitions outside the range; the
+    station filter uses the (STATION, DATE) index of each remaining one.
+    """
+    columns = ['count(*) AS observations', 'min("DATE") AS first', 'max("DATE") AS last']
+    if station is None:
+        columns.append('count(DISTINCT "STATION") AS stations')
+    # Metric names come from GSOD_METRICS, so they are safe to use as identifiers
+    for metric in metrics:
+        present = f'"{metric}" <> {GSOD_METRICS[metric]!r}'
+        columns += [
+            f'count("{metric}") FILTER (WHERE {present}) AS "{metric}_days"',
+            f'min("{metric}") FILTER (WHERE {present}) AS "{metric}_min"',
+            f'max("{metric}") FILTER (WHERE {present}) AS "{metric}_max"',
+            f'avg("{metric}") FILTER (WHERE {present}) AS "{metric}_avg"',
+        ]
+
+    conditions, args = [], []
+    lower, upper = date_bounds(dataset, start, end)
+    for condition, value in (('"STATION" = ${}', station), ('"DATE" >= ${}', lower), ('"DATE" < ${}', upper)):
+        if value is not None:
+            args.append(value)
+            conditions.append(condition.format(len(args)))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {', '.join(columns)} FROM {TABLES[dataset]} {where}", args
+
+
+async def fetch_summary(name, dataset, metrics, station, start, end):
+    """Run (or reuse) a statistics query and shape its single row."""
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if dataset == "isd" and metrics:
+        raise HTTPException(status_code=400, detail="ISD observations are coded text; metrics are only available for gsod")
+    metrics = metrics or (DEFAULT_STATS_METRICS if dataset == "gsod" else [])
+
+    async def compute():
+        query, args = summary_query(dataset, metrics, station, start, end)
+        row = (await postgres.fetch(name, query, *args))[0]
+        summary = {
+            "observations": row["observations"],
+            "first": row["first"].isoformat() if row["first"] else None,
+            "last": row["last"].isoformat() if row["last"] else None,
+        }
+        if station is None:
+            summary["stations"] = row["stations"]
+        if metrics:
+            summary["metrics"] = {
+                metric: {stat: row[f"{metric}_{stat}"] for stat in ("days", "min", "max", "avg")} for metric in metrics
+            }
+        return summary
+
+    try:
+        key = (TABLES[dataset], "stats", station, start, end, tuple(metrics))
+        summary = await aggregation_cache.get_or_compute(key, compute)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PostgreSQL query failed: {e}")
+    return {"dataset": dataset, "start": start, "end": end, **summary}
+
+
+@router.get("/postgres/{dataset}/stations/{station}/stats")
+async def station_stats(
+    dataset: Literal["gsod", "isd"],
+    station: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    metrics: Optional[List[Literal[tuple(GSOD_METRICS)]]] = Query(None),
+    username: str = Depends(decode_access_token)
+):
+    """Observation count, first/last date and (GSOD) metric min/max/avg of one station, over an optional date range.
+
+    Missing readings (NOAA's 9999.9 and similar) are left out of the metrics.
+    """
+    summary = await fetch_summary("station_stats", dataset, metrics, station, start, end)
+    return {"station": station, **summary}
+
+
+@router.get("/postgres/{dataset}/stats")
+async def range_stats(
+    dataset: Literal["gsod", "isd"],
+    start: date,
+    end: date,
+    metrics: Optional[List[Literal[tuple(GSOD_METRICS)]]] = Query(None),
+    username: str = Depends(decode_access_token)
+):
+    """Reporting stations, observations and (GSOD) metric min/max/avg of every station between two dates (inclusive)."""
+    return await fetch_summary("range_stats", dataset, metrics, None, start, end)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from auth import decode_access_token
+from autocomplete import autocomplete
+from typing import Literal
+
+MAX_SUGGESTIONS = 50
+
+# Create a router for autocomplete routes
+router = APIRouter()
+
+
+@router.get("/elasticsearch/{index}/autocomplete")
+async def autocomplete_values(
+    index: str,
+    field: Literal["STATE", "EVENT_TYPE", "CZ_NAME"],
+    prefix: str = "",
+    size: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    username: str = Depends(decode_access_token)
+):
+    """Most frequent values of a field with a word starting with `prefix` (case-insensitive).
+
+    Served from memory, without an Elasticsearch round trip, so it can be
+    called on every keystroke. Values are refreshed periodically.
+    """
+    suggestions = autocomplete.suggest(index, field, prefix, size)
+    if suggestions is None:
+        if index not in autocomplete.indices:
+            raise HTTPException(status_code=404, detail=f"Autocomplete is not enabled for {index}")
+        raise HTTPException(status_code=503, detail="Autocomplete values are still loading")
+    return {
+        "field": field,
+        "prefix": prefix,
+        "suggestions": [{"value": value, "doc_count": count} for value, count in suggestions],
+    }
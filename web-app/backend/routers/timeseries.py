@@ -0,0 +1,136 @@
+from datetime import date
+from fastapi import APIRouter, HTTPException, Depends, Query
+from auth import decode_access_token
+from cache import aggregation_cache
+from db import postgres
+from downsample import downsample
+from es import es_client
+from routers.protected import build_filter_query
+from typing import Literal, Optional, List
+
+# Points returned per series unless the caller asks for fewer (or more, up to MAX_POINTS)
+DEFAULT_MAX_POINTS = 1000
+MAX_POINTS = 10000
+
+# Storm event metrics -> the fields summed into them
+EVENT_METRICS = {
+    "deaths": ["DEATHS_DIRECT", "DEATHS_INDIRECT"],
+    "injuries": ["INJURIES_DIRECT", "INJURIES_INDIRECT"],
+    "damage_property": ["DAMAGE_PROPERTY"],
+    "damage_crops": ["DAMAGE_CROPS"],
+}
+
+# GSOD columns that can be charted, with the value NOAA uses for "missing"
+GSOD_METRICS = {
+    "TEMP": 9999.9, "DEWP": 9999.9, "SLP": 9999.9, "STP": 9999.9, "MAX": 9999.9, "MIN": 9999.9,
+    "VISIB": 999.9, "WDSP": 999.9, "MXSPD": 999.9, "GUST": 999.9, "SNDP": 999.9, "PRCP": 99.99,
+}
+
+# Create a router for time series routes
+router = APIRouter()
+
+
+@router.get("/elasticsearch/{index}/timeseries")
+async def event_timeseries(
+    index: str,
+    interval: Literal["day", "week", "month", "quarter", "year"] = "month",
+    metrics: List[Literal["count", "deaths", "injuries", "damage_property", "damage_crops"]] = Query(["count"]),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    state: Optional[str] = None,
+    event_type: Optional[str] = None,
+    year: Optional[int] = None,
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=MAX_POINTS),
+    username: str = Depends(decode_access_token)
+):
+    """Events per interval on BEGIN_DATE_TIME, filtered like the events route.
+
+    Each point carries the requested metrics (`count` and sums of deaths,
+    injuries or damage). Series longer than `max_points` are downsampled
+    with LTTB on the first metric; every metric keeps the same points.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    async def compute():
+        query = build_filter_query(state, event_type, year)
+        if start or end:
+            bounds = {"format": "yyyy-MM-dd"}
+            if start:
+                bounds["gte"] = start.isoformat()
+            if end:
+                bounds["lte"] = end.isoformat()
+            query["bool"].setdefault("filter", []).append({"range": {"BEGIN_DATE_TIME": bounds}})
+        fields = [field for metric in metrics if metric != "count" for field in EVENT_METRICS[metric]]
+        response = await es_client.search(
+            index=index,
+            query=query,
+            aggs={
+                "series": {
+                    "date_histogram": {
+                        "field": "BEGIN_DATE_TIME",
+                        "calendar_interval": interval,
+                        "format": "yyyy-MM-dd",
+                        "min_doc_count": 0,
+                    },
+                    "aggs": {field: {"sum": {"field": field}} for field in fields},
+                }
+            },
+            size=0
+        )
+        points = []
+        for bucket in response["aggregations"]["series"]["buckets"]:
+            point = {"date": bucket["key_as_string"], "timestamp": bucket["key"]}
+            for metric in metrics:
+                if metric == "count":
+                    point[metric] = bucket["doc_count"]
+                else:
+                    point[metric] = sum(bucket[field]["value"] or 0 for field in EVENT_METRICS[metric])
+            points.append(point)
+        return {"buckets": len(points), "points": downsample(points, "timestamp", metrics[0], max_points)}
+
+    try:
+        key = (index, "timeseries", interval, tuple(metrics), start, end, state, event_type, year, max_points)
+        series = await aggregation_cache.get_or_compute(key, compute)
+        return {"interval": interval, **series}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Elasticsearch aggregation failed: {e}")
+
+
+@router.get("/postgres/gsod/stations/{station}/timeseries")
+async def gsod_timeseries(
+    station: str,
+    start: date,
+    end: date,
+    metric: Literal[tuple(GSOD_METRICS)] = "TEMP",
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=MAX_POINTS),
+    username: str = Depends(decode_access_token)
+):
+    """Daily GSOD values of one station between two dates (inclusive), missing readings left out.
+
+    Series longer than `max_points` are downsampled with LTTB.
+    """
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    # `metric` is one of the GSOD_METRICS names, so it is safe to use as an identifier.
+    # The date range only touches the yearly partitions it overlaps.
+    query = f"""
+        SELECT "DATE" AS date, "{metric}" AS value
+        FROM gsod_data
+        WHERE "STATION" = $1 AND "DATE" BETWEEN $2 AND $3 AND "{metric}" <> $4
+        ORDER BY 1
+    """
+    try:
+        rows = await postgres.fetch("gsod_timeseries", query, station, start, end, GSOD_METRICS[metric])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PostgreSQL query failed: {e}")
+
+    points = [{"date": row["date"].isoformat(), "day": row["date"].toordinal(), "value": row["value"]} for row in rows]
+    points = downsample(points, "day", "value", max_points)
+    return {
+        "station": station,
+        "metric": metric,
+        "days": len(rows),
+        "points": [{"date": point["date"], "value": point["value"]} for point in points],
+    }
@@ -11,10 +11,34 @@ import {
 
 ChartJS.register(CategoryScale, LinearScale, BarElement, Tooltip, Legend);
 
-const EventTypeChart = ({ token }) => {
+const toChartData = (aggregations) => {
+  const labels = aggregations.map((bucket) => bucket.key);
+  const values = aggregations.map((bucket) => bucket.doc_count);
+
+  return {
+    labels,
+    datasets: [
+      {
+        label: "Event Count by Type",
+        data: values,
+        backgroundColor: "rgba(75, 192, 192, 0.2)",
+        borderColor: "rgba(75, 192, 192, 1)",
+        borderWidth: 1,
+      },
+    ],
+  };
+};
+
+const EventTypeChart = ({ token, buckets }) => {
   const [chartData, setChartData] = useState(null);
 
   useEffect(() => {
+    // The dashboard may already have loaded the buckets in its batched request
+    if (buckets) {
+      setChartData(toChartData(buckets));
+      return;
+    }
+
     const fetchData = async () => {
       try {
         const response = await fetch(
@@ -25,28 +49,14 @@ const EventTypeChart = ({ token }) => {
         );
         const data = await response.json();
 
-        const labels = data.aggregations.map((bucket) => bucket.key);
-        const values = data.aggregations.map((bucket) => bucket.doc_count);
-
-        setChartData({
-          labels,
-          datasets: [
-            {
-              label: "Event Count by Type",
-              data: values,
-              backgroundColor: "rgba(75, 192, 192, 0.2)",
-              borderColor: "rgba(75, 192, 192, 1)",
-              borderWidth: 1,
-            },
-          ],
-        });
+        setChartData(toChartData(data.aggregations));
       } catch (error) {
         console.error("Error fetching event type data:", error);
       }
     };
 
     fetchData();
-  }, [token]);
+  }, [token, buckets]);
 
   if (!chartData) return <p>Loading chart...</p>;
 
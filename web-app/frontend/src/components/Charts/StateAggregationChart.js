@@ -11,10 +11,34 @@ import {
 
 ChartJS.register(CategoryScale, LinearScale, ArcElement, Tooltip, Legend);
 
-const StateAggregationChart = ({ token }) => {
+const toChartData = (aggregations) => {
+  const labels = aggregations.map((bucket) => bucket.key);
+  const values = aggregations.map((bucket) => bucket.doc_count);
+
+  return {
+    labels,
+    datasets: [
+      {
+        label: "Event Count by State",
+        data: values,
+        backgroundColor: labels.map(
+          (_, index) => `hsl(${(index / labels.length) * 360}, 70%, 50%)`
+        ),
+      },
+    ],
+  };
+};
+
+const StateAggregationChart = ({ token, buckets }) => {
   const [chartData, setChartData] = useState(null);
 
   useEffect(() => {
+    // The dashboard may already have loaded the buckets in its batched request
+    if (buckets) {
+      setChartData(toChartData(buckets));
+      return;
+    }
+
     const fetchData = async () => {
       try {
         const response = await fetch(
@@ -25,28 +49,14 @@ const StateAggregationChart = ({ token }) => {
         );
         const data = await response.json();
 
-        const labels = data.aggregations.map((bucket) => bucket.key);
-        const values = data.aggregations.map((bucket) => bucket.doc_count);
-
-        setChartData({
-          labels,
-          datasets: [
-            {
-              label: "Event Count by State",
-              data: values,
-              backgroundColor: labels.map(
-                (_, index) => `hsl(${(index / labels.length) * 360}, 70%, 50%)`
-              ),
-            },
-          ],
-        });
+        setChartData(toChartData(data.aggregations));
       } catch (error) {
         console.error("Error fetching state aggregation data:", error);
       }
     };
 
     fetchData();
-  }, [token]);
+  }, [token, buckets]);
 
   if (!chartData) return <p>Loading chart...</p>;
 
@@ -1,20 +1,42 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 
-const DataTable = ({ token }) => {
-  const [data, setData] = useState([]);
-  const [loading, setLoading] = useState(true);
+export const PAGE_SIZE = 10;
+export const TABLE_FIELDS = ["STATE", "EVENT_TYPE", "BEGIN_DATE_TIME"];
+
+const PAGE_URL =
+  `http://localhost:8000/protected/elasticsearch/mongo_storm_events_data?pagination=cursor&size=${PAGE_SIZE}` +
+  TABLE_FIELDS.map((field) => `&fields=${field}`).join("");
+
+// initialPage: first page ({ results, next_cursor }) already loaded by the dashboard batch;
+// without it, or when it failed, the table fetches its first page itself
+const DataTable = ({ token, initialPage }) => {
+  const firstPage = initialPage && initialPage.results ? initialPage : null;
+  const [data, setData] = useState(firstPage ? firstPage.results : []);
+  const [loading, setLoading] = useState(!firstPage);
+  const [cursor, setCursor] = useState(null);
+  const [nextCursor, setNextCursor] = useState(firstPage ? firstPage.next_cursor : null);
 
   useEffect(() => {
+    if (!cursor && firstPage) {
+      // Back on the first page: reuse the batched rows instead of another request
+      setData(firstPage.results);
+      setNextCursor(firstPage.next_cursor);
+      setLoading(false);
+      return;
+    }
+
     const fetchData = async () => {
+      setLoading(true);
       try {
-        const response = await axios.get(
-          "http://localhost:8000/protected/elasticsearch/mongo_storm_events_data?page=1&size=10",
-          {
-            headers: { Authorization: `Bearer ${token}` },
-          }
-        );
+        const url = cursor
+          ? `${PAGE_URL}&cursor=${encodeURIComponent(cursor)}`
+          : PAGE_URL;
+        const response = await axios.get(url, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
         setData(response.data.results);
+        setNextCursor(response.data.next_cursor);
       } catch (error) {
         console.error("Failed to fetch data:", error);
       } finally {
@@ -23,29 +45,47 @@ const DataTable = ({ token }) => {
     };
 
     fetchData();
-  }, [token]);
+  }, [token, cursor, firstPage]);
 
   if (loading) return <p>Loading data...</p>;
 
   return (
-    <table>
-      <thead>
-        <tr>
-          <th>State</th>
-          <th>Event Type</th>
-          <th>Date</th>
-        </tr>
-      </thead>
-      <tbody>
-        {data.map((row, index) => (
-          <tr key={index}>
-            <td>{row.STATE}</td>
-            <td>{row.EVENT_TYPE}</td>
-            <td>{row.BEGIN_DATE_TIME}</td>
+    <div>
+      <table>
+        <thead>
+          <tr>
+            <th>State</th>
+            <th>Event Type</th>
+            <th>Date</th>
           </tr>
-        ))}
-      </tbody>
-    </table>
+        </thead>
+        <tbody>
+          {data.map((row, index) => (
+            <tr key={index}>
+              <td>{row.STATE}</td>
+              <td>{row.EVENT_TYPE}</td>
+              <td>{row.BEGIN_DATE_TIME}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+      <div className="flex gap-2 mt-4">
+        <button
+          onClick={() => setCursor(null)}
+          disabled={!cursor}
+          className="py-1 px-3 rounded-md border disabled:opacity-50"
+        >
+          First page
+        </button>
+        <button
+          onClick={() => setCursor(nextCursor)}
+          disabled={!nextCursor}
+          className="py-1 px-3 rounded-md border disabled:opacity-50"
+        >
+          Next page
+        </button>
+      </div>
+    </div>
   );
 };
 
@@ -1,10 +1,51 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import EventTypeChart from "../components/Charts/EventTypeChart";
 import StateAggregationChart from "../components/Charts/StateAggregationChart";
 import SearchEventsChart from "../components/Charts/SearchEventsChart";
 import PropertyDamageByEventTypeChart from "../components/Charts/PropertyDamageByEventTypeChart";
+import DataTable, { PAGE_SIZE, TABLE_FIELDS } from "../components/Data/DataTable";
+
+const DASHBOARD_WIDGETS = {
+  index: "mongo_storm_events_data",
+  widgets: [
+    { id: "event_types", type: "aggregate", field: "event_type", size: 10 },
+    { id: "states", type: "aggregate", field: "state", size: 10 },
+    // First page of the events table, so loading the dashboard is a single round trip
+    { id: "events", type: "events", pagination: "cursor", size: PAGE_SIZE, fields: TABLE_FIELDS },
+  ],
+};
 
 const Dashboard = ({ token, onLogout }) => {
+  // null while loading; {} when the batched request failed and widgets fetch on their own
+  const [widgets, setWidgets] = useState(null);
+
+  useEffect(() => {
+    const fetchWidgets = async () => {
+      try {
+        const response = await fetch("http://localhost:8000/protected/dashboard", {
+          method: "POST",
+          headers: {
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify(DASHBOARD_WIDGETS),
+        });
+        if (!response.ok) {
+          throw new Error(`Failed to fetch dashboard widgets (${response.status})`);
+        }
+        const data = await response.json();
+        setWidgets(data.widgets || {});
+      } catch (error) {
+        console.error("Error fetching dashboard widgets:", error);
+        setWidgets({});
+      }
+    };
+
+    fetchWidgets();
+  }, [token]);
+
+  if (!widgets) return <p className="p-8">Loading dashboard...</p>;
+
   return (
     <div className="p-8 bg-gray-50 min-h-screen">
       <div className="flex justify-between items-center mb-6">
@@ -18,10 +59,19 @@ const Dashboard = ({ token, onLogout }) => {
       </div>
       <div className="grid grid-cols-1 sm:grid-cols-2 gap-6">
         <div className="bg-white p-4 shadow-md rounded">
-          <EventTypeChart token={token} />
+          <EventTypeChart
+            token={token}
+            buckets={widgets.event_types?.aggregations}
+          />
         </div>
         <div className="bg-white p-4 shadow-md rounded">
-          <StateAggregationChart token={token} />
+          <StateAggregationChart
+            token={token}
+            buckets={widgets.states?.aggregations}
+          />
+        </div>
+        <div className="bg-white p-4 shadow-md rounded sm:col-span-2">
+          <DataTable token={token} initialPage={widgets.events} />
         </div>
         {/* <div className="bg-white p-4 shadow-md rounded">
           <SearchEventsChart